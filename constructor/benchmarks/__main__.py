@@ -0,0 +1,74 @@
+from datetime import datetime, timezone
+import argparse
+import importlib
+import json
+import platform
+import subprocess
+import sys
+
+import numpy as np
+
+from .timing import flatten
+
+
+SUITES = ('calculator', 'views', 'emit', 'startup', 'exact')
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], check=True, capture_output=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(suites: list[str]) -> dict:
+    results = {}
+    for suite in suites:
+        print(f"Running {suite}...", file=sys.stderr)
+        results.update(flatten(importlib.import_module(f'{__package__}.{suite}').run(), suite))
+
+    return {
+        'commit': git_commit(),
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'results': results,
+    }
+
+
+def compare(report: dict, baseline: dict) -> None:
+    print(f"{'benchmark':<32} {baseline['commit'] or 'baseline':>12} {report['commit'] or 'current':>12} {'ratio':>8}")
+    for name, timing in report['results'].items():
+        if name in baseline['results']:
+            baseline_timing = baseline['results'][name]
+            print(f"{name:<32} {baseline_timing * 1e6:>10.1f}us {timing * 1e6:>10.1f}us {timing / baseline_timing:>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Offline benchmarks, run from constructor/.')
+    parser.add_argument('suites', nargs='*', metavar='suite', help=f"Suites to run, all by default: {', '.join(SUITES)}.")
+    parser.add_argument('-o', '--output', help='Write results as JSON to this file.')
+    parser.add_argument('-c', '--compare', help='JSON results of a previous run to compare with.')
+    args = parser.parse_args()
+    if unknown := set(args.suites) - set(SUITES):
+        parser.error(f"unknown suites: {', '.join(sorted(unknown))}")
+
+    report = run(args.suites or list(SUITES))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            compare(report, json.load(f))
+    else:
+        for name, timing in report['results'].items():
+            print(f"{name:<32} {timing * 1e6:>12.1f} us")
+
+
+if __name__ == '__main__':
+    main()
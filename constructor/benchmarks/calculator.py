@@ -0,0 +1,30 @@
+from plugins.loan.calculator import Loan
+
+from .timing import best_of
+
+
+LOAN_AMOUNT = 12_345_678.9
+INTEREST_RATE_YEARLY = 0.1675
+LOAN_TERMS_YEARS = range(1, 51)
+
+
+def calc(loan_amount: float, interest_rate_yearly: float, loan_term_years: int) -> None:
+    loan = Loan()
+    loan.loan_amount, loan.interest_rate_yearly, loan.loan_term_years = loan_amount, interest_rate_yearly, loan_term_years
+    loan.calc()
+
+
+def run() -> dict[int, float]:
+    return {
+        loan_term_years: best_of(lambda: calc(LOAN_AMOUNT, INTEREST_RATE_YEARLY, loan_term_years))
+        for loan_term_years in LOAN_TERMS_YEARS
+    }
+
+
+def main():
+    for loan_term_years, timing in run().items():
+        print(f"{loan_term_years:>3} years {timing * 1e6:>10.1f} us")
+
+
+if __name__ == '__main__':
+    main()
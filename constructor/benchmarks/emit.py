@@ -0,0 +1,38 @@
+from event_system import EventSystem
+
+from .timing import best_of
+
+
+EVENT_NAME = 'benchmark.event'
+NUMBERS_OF_HANDLERS = (1, 10, 100)
+NUMBER = 10_000
+
+
+def handler(*args) -> None:
+    pass
+
+
+def event_system_with(number_of_handlers: int, instrumented: bool = False) -> EventSystem:
+    event_system = EventSystem(instrumented=instrumented)
+    for _ in range(number_of_handlers):
+        event_system.subscribe(EVENT_NAME, handler)
+    return event_system
+
+
+def run() -> dict[str, dict[int, float]]:
+    results = {'plain': {}, 'instrumented': {}}
+    for mode, instrumented in (('plain', False), ('instrumented', True)):
+        for number_of_handlers in NUMBERS_OF_HANDLERS:
+            event_system = event_system_with(number_of_handlers, instrumented)
+            results[mode][number_of_handlers] = best_of(lambda: event_system.emit(EVENT_NAME, 1, 'payload'), number=NUMBER)
+    return results
+
+
+def main():
+    for mode, timings in run().items():
+        for number_of_handlers, timing in timings.items():
+            print(f"{mode:<12} {number_of_handlers:>4} handlers {timing * 1e6:>10.2f} us")
+
+
+if __name__ == '__main__':
+    main()
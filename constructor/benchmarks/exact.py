@@ -0,0 +1,45 @@
+from plugins.loan.calculator import NUMBER_OF_MONTHS_IN_YEAR, Loan, calc_exact
+from plugins.loan.exact import calc_decimal, to_ratio
+
+from .timing import best_of
+
+
+LOAN_AMOUNT = 12_345_678.9
+INTEREST_RATE_YEARLY = 0.1675
+LOAN_TERMS_YEARS = (5, 30)
+
+
+def calc_float(loan_amount: float, interest_rate_yearly: float, loan_term_years: int) -> None:
+    loan = Loan()
+    loan.loan_amount, loan.interest_rate_yearly, loan.loan_term_years = loan_amount, interest_rate_yearly, loan_term_years
+    loan.calc()
+
+
+def calc_decimal_schedule(loan_amount: float, interest_rate_yearly: float, loan_term_years: int) -> None:
+    calc_decimal(
+        loan_amount,
+        to_ratio(interest_rate_yearly, NUMBER_OF_MONTHS_IN_YEAR),
+        loan_term_years * NUMBER_OF_MONTHS_IN_YEAR,
+    )
+
+
+def run() -> dict[str, dict[int, float]]:
+    results = {}
+    for name, calc in (('float', calc_float), ('exact', calc_exact), ('decimal', calc_decimal_schedule)):
+        results[name] = {}
+        for loan_term_years in LOAN_TERMS_YEARS:
+            results[name][loan_term_years] = best_of(lambda: calc(LOAN_AMOUNT, INTEREST_RATE_YEARLY, loan_term_years))
+    return results
+
+
+def main():
+    results = run()
+    for loan_term_years in LOAN_TERMS_YEARS:
+        decimal_time = results['decimal'][loan_term_years]
+        for name, timings in results.items():
+            print(f"{loan_term_years:>3} years  {name:<8} {timings[loan_term_years] * 1e6:>10.1f} us"
+                  f"  x{decimal_time / timings[loan_term_years]:.1f} vs decimal")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,318 @@
+from collections import defaultdict
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import asyncio
+import dataclasses
+import json
+import random
+import string
+import sys
+import time
+
+import numpy as np
+from flet import Page
+from flet.core.event import Event
+from flet.core.local_connection import LocalConnection
+from flet.core.protocol import (
+    CommandEncoder,
+    PageCommandResponsePayload,
+    PageCommandsBatchResponsePayload,
+    RegisterWebClientRequestPayload,
+)
+
+from plugins import discover_plugins
+import constants
+import main as app
+
+
+SESSIONS = 20
+ROUNDS = 3
+RAMP_SECONDS = 5.0
+# A user types a digit every THINK_SECONDS and reads the result for PAUSE_SECONDS before the next field.
+THINK_SECONDS = (0.08, 0.3)
+PAUSE_SECONDS = (0.5, 2.0)
+TYPO_PROBABILITY = 0.05
+TIMEOUT_SECONDS = 30.0
+PERCENTILES = (50, 95, 99)
+
+
+# Applies commands the way the flet socket server does and serializes the messages it would send, but delivers
+# them nowhere, so a session needs neither a browser nor a network and update() costs what it costs in production.
+class StandInConnection(LocalConnection):
+    def __init__(self, session_id: str, on_send):
+        super().__init__()
+        self._client_details = RegisterWebClientRequestPayload(
+            pageName='',
+            pageRoute='/',
+            pageWidth=str(constants.PAGE_WIDTH),
+            pageHeight=str(constants.PAGE_HEIGHT),
+            windowWidth=str(constants.PAGE_WIDTH),
+            windowHeight=str(constants.PAGE_HEIGHT),
+            windowTop='0',
+            windowLeft='0',
+            isPWA='false',
+            isWeb='true',
+            isDebug='false',
+            platform='linux',
+            platformBrightness='light',
+            media='{}',
+            sessionId=session_id,
+        )
+        self.on_send = on_send
+
+    def send_command(self, session_id: str, command):
+        result, message = self._process_command(command)
+        self.__send([message] if message is not None else [])
+        return PageCommandResponsePayload(result=result, error='')
+
+    def send_commands(self, session_id: str, commands):
+        results, messages = [], []
+        for command in commands:
+            result, message = self._process_command(command)
+            if command.name in ('add', 'get'):
+                results.append(result)
+            if message is not None:
+                messages.append(message)
+        self.__send(messages)
+        return PageCommandsBatchResponsePayload(results=results, error='')
+
+    def __send(self, messages: list) -> None:
+        nbytes = sum(len(json.dumps(message, cls=CommandEncoder, separators=(',', ':'))) for message in messages)
+        self.on_send(time.perf_counter(), nbytes)
+
+
+@dataclasses.dataclass(frozen=True)
+class Latency:
+    count: int
+    p50: float
+    p95: float
+    p99: float
+    max: float
+
+    @classmethod
+    def of(cls, seconds: list[float]) -> 'Latency':
+        p50, p95, p99 = np.percentile(seconds, PERCENTILES) if seconds else (0.0,) * len(PERCENTILES)
+        return cls(len(seconds), float(p50), float(p95), float(p99), max(seconds, default=0.0))
+
+
+@dataclasses.dataclass(frozen=True)
+class LoadReport:
+    sessions: int
+    seconds: float
+    inputs: int
+    updates: int
+    bytes_sent: int
+    timeouts: int
+    latency: dict[str, Latency]
+
+    @property
+    def throughput(self) -> float:
+        return self.inputs / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        lines = [
+            f"{self.sessions} sessions, {self.seconds:.1f} s: {self.inputs} inputs ({self.throughput:.1f}/s), "
+            f"{self.updates} updates ({self.updates / self.seconds:.1f}/s), {self.bytes_sent / 2 ** 20:.1f} MiB sent, "
+            f"{self.timeouts} timeouts",
+            f"{'latency, ms':<16} {'count':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}",
+        ]
+        for kind, latency in self.latency.items():
+            lines.append(
+                f"{kind:<16} {latency.count:>7} {latency.p50 * 1e3:>8.1f} {latency.p95 * 1e3:>8.1f} "
+                f"{latency.p99 * 1e3:>8.1f} {latency.max * 1e3:>8.1f}"
+            )
+        return '\n'.join(lines)
+
+
+def keystrokes(text: str, rng: random.Random) -> Iterator[str]:
+    # Field contents after each keystroke of typing `text` over the selected old value; now and then
+    # a wrong digit is typed and erased.
+    for n in range(1, len(text) + 1):
+        if n > 1 and rng.random() < TYPO_PROBABILITY:
+            yield text[:n - 1] + rng.choice(string.digits)
+            yield text[:n - 1]
+        yield text[:n]
+
+
+def tab_index(class_name: str) -> int:
+    return next(n for n, spec in enumerate(discover_plugins()) if spec.class_name == class_name)
+
+
+class Session:
+    def __init__(self, number: int, executor: ThreadPoolExecutor, rng: random.Random, speed: float):
+        self.loop = asyncio.get_running_loop()
+        self.rng = rng
+        self.speed = speed
+        # Timestamps and sizes of update() calls, appended by the loop and the handler threads.
+        self.sends: list[tuple[float, int]] = []
+        # Kind, timestamp and len(sends) at the time of every input event.
+        self.inputs: list[tuple[str, float, int]] = []
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.timeouts = 0
+        self.__sent = asyncio.Event()
+        session_id = f'loadtest-{number}'
+        self.page = Page(StandInConnection(session_id, self.__on_send), session_id, loop=self.loop, executor=executor)
+
+    def __on_send(self, timestamp: float, nbytes: int) -> None:
+        self.sends.append((timestamp, nbytes))
+        self.loop.call_soon_threadsafe(self.__sent.set)
+
+    def __first_send(self, after: float, start: int) -> float | None:
+        return min((timestamp for timestamp, _ in self.sends[start:] if timestamp >= after), default=None)
+
+    async def wait_for_send(self, after: float, start: int) -> float | None:
+        deadline = time.perf_counter() + TIMEOUT_SECONDS
+        while True:
+            self.__sent.clear()
+            sent = self.__first_send(after, start)
+            if sent is not None:
+                return sent
+            try:
+                await asyncio.wait_for(self.__sent.wait(), deadline - time.perf_counter())
+            except TimeoutError:
+                self.timeouts += 1
+                return None
+
+    async def open(self) -> None:
+        started = time.perf_counter()
+        await app.main(self.page)
+        self.latencies['open'].append(time.perf_counter() - started)
+        self.tabs = self.page.controls[0].content
+        self.loan_tab = tab_index('LoanPlugin')
+        self.beam_tab = tab_index('BeamPlugin')
+
+    async def __input(self, kind: str, control, data: str, prop: str) -> tuple[float, int]:
+        # What the client sends for an edit: the new property value, then the control event.
+        started, start = time.perf_counter(), len(self.sends)
+        self.inputs.append((kind, started, start))
+        await self.page.on_event_async(Event('page', 'change', json.dumps([{'i': control.uid, prop: data}])))
+        await self.page.on_event_async(Event(control.uid, 'change', data))
+        return started, start
+
+    async def __think(self, seconds: tuple[float, float]) -> None:
+        await asyncio.sleep(self.rng.uniform(*seconds) / self.speed)
+
+    async def type_into(self, kind: str, field, text: str) -> tuple[float, int]:
+        for value in keystrokes(text, self.rng):
+            started, start = await self.__input(kind, field, value, 'value')
+            await self.__think(THINK_SECONDS)
+        await self.wait_for_send(started, start)
+        return started, start
+
+    async def click(self, kind: str, control, data: str, prop: str) -> None:
+        started, start = await self.__input(kind, control, data, prop)
+        await self.wait_for_send(started, start)
+
+    async def type_loan(self, field, text: str) -> None:
+        loan = self.tabs.data[self.loan_tab]
+        started, _ = await self.type_into('loan.keystroke', field.value_field, text)
+        # The echo of the last keystroke is sent after it scheduled the recalculation, so render_task is the
+        # latest one; it is complete when the recalculated views are sent. A render that changed nothing sends nothing.
+        echoed = len(self.sends)
+        try:
+            await asyncio.wait_for(asyncio.wrap_future(loan.render_task), TIMEOUT_SECONDS)
+            if len(self.sends) > echoed:
+                self.latencies['loan.render'].append(self.sends[-1][0] - started)
+        except asyncio.CancelledError:
+            pass
+        except TimeoutError:
+            self.timeouts += 1
+        await self.__think(PAUSE_SECONDS)
+
+    async def type_beam(self, field, text: str) -> None:
+        await self.type_into('beam.keystroke', field.value_field, text)
+        await self.__think(PAUSE_SECONDS)
+
+    async def select_tab(self, index: int) -> None:
+        await self.click('tab', self.tabs, str(index), 'selectedindex')
+        await self.__think(PAUSE_SECONDS)
+
+    async def switch_view(self, is_chart: bool) -> None:
+        loan = self.tabs.data[self.loan_tab]
+        await self.click('switch', loan.view_switch, str(is_chart).lower(), 'value')
+        await self.__think(PAUSE_SECONDS)
+
+    async def round(self) -> None:
+        loan = self.tabs.data[self.loan_tab]
+        rng = self.rng
+        await self.type_loan(loan.loan_amount, str(rng.randrange(500_000, 20_000_000, 50_000)))
+        await self.type_loan(loan.interest_rate_yearly, f'{rng.randrange(50, 250, 5) / 10:g}')
+        await self.type_loan(loan.loan_term_years, str(rng.randint(5, 30)))
+        await self.switch_view(True)
+        await self.type_loan(loan.monthly_topup_extra, str(rng.randrange(5_000, 100_000, 5_000)))
+        await self.switch_view(False)
+
+        await self.select_tab(self.beam_tab)
+        beam = self.tabs.data[self.beam_tab]
+        await self.type_beam(beam.m_field, str(rng.randint(5, 500)))
+        await self.type_beam(beam.sigma_field, str(rng.choice((160, 210, 235, 245, 275, 345))))
+        await self.select_tab(self.loan_tab)
+
+    # The first update after an input is taken as its echo: keystrokes do not wait for it, like a typist.
+    def echo_latencies(self) -> None:
+        for kind, started, start in self.inputs:
+            sent = self.__first_send(started, start)
+            if sent is not None:
+                self.latencies[kind].append(sent - started)
+
+
+async def simulate(session: Session, rounds: int, delay: float) -> None:
+    await asyncio.sleep(delay)
+    await session.open()
+    for _ in range(rounds):
+        await session.round()
+    session.echo_latencies()
+
+
+async def load_test(sessions: int, rounds: int, ramp_seconds: float, speed: float, seed: int) -> LoadReport:
+    executor = ThreadPoolExecutor(thread_name_prefix='loadtest')
+    rng = random.Random(seed)
+    users = [Session(n, executor, random.Random(rng.random()), speed) for n in range(sessions)]
+
+    started = time.perf_counter()
+    await asyncio.gather(*(simulate(user, rounds, rng.uniform(0, ramp_seconds)) for user in users))
+    seconds = time.perf_counter() - started
+    executor.shutdown()
+
+    latencies = defaultdict(list)
+    for user in users:
+        for kind, samples in user.latencies.items():
+            latencies[kind].extend(samples)
+    return LoadReport(
+        sessions=sessions,
+        seconds=seconds,
+        inputs=sum(len(user.inputs) for user in users),
+        updates=sum(len(user.sends) for user in users),
+        bytes_sent=sum(nbytes for user in users for _, nbytes in user.sends),
+        timeouts=sum(user.timeouts for user in users),
+        latency={kind: Latency.of(samples) for kind, samples in sorted(latencies.items())},
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.loadtest',
+        description='Simulate concurrent users against a stand-in flet client, offline; run from constructor/.',
+    )
+    parser.add_argument('-s', '--sessions', type=int, default=SESSIONS)
+    parser.add_argument('-r', '--rounds', type=int, default=ROUNDS, help='Passes over the loan and beam fields per session.')
+    parser.add_argument('--ramp', type=float, default=RAMP_SECONDS, help='Sessions start at random within this many seconds.')
+    parser.add_argument('--speed', type=float, default=1.0, help='Typing speed factor, divides think times.')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', help='Write the report as JSON to this file.')
+    args = parser.parse_args()
+    if args.sessions < 1 or args.rounds < 1 or args.speed <= 0:
+        parser.error('sessions and rounds must be positive, and speed greater than zero')
+
+    print(f"Simulating {args.sessions} sessions...", file=sys.stderr)
+    report = asyncio.run(load_test(args.sessions, args.rounds, args.ramp, args.speed, args.seed))
+    print(report)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({**dataclasses.asdict(report), 'throughput': report.throughput}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+from pathlib import Path
+import subprocess
+import sys
+import time
+
+
+CONSTRUCTOR_DIR = Path(__file__).resolve().parent.parent
+MODULES = ('flet', 'plugins', 'main')
+# Everything main() does before the first page.add, without a flet client.
+FIRST_FRAME = 'import main; from event_system import EventSystem; main.build_tabs(None, EventSystem())'
+REPEAT = 5
+
+
+def cold_run(code: str) -> float:
+    # A fresh interpreter per sample, so nothing is shared with modules already imported by the runner.
+    started = time.perf_counter()
+    subprocess.run([sys.executable, '-c', code], cwd=CONSTRUCTOR_DIR, check=True, capture_output=True)
+    return time.perf_counter() - started
+
+
+def run() -> dict[str, float]:
+    results = {'python': min(cold_run('import sys') for _ in range(REPEAT))}
+    for module in MODULES:
+        results[module] = min(cold_run(f'import {module}') for _ in range(REPEAT))
+    results['first_frame'] = min(cold_run(FIRST_FRAME) for _ in range(REPEAT))
+    return results
+
+
+def main():
+    for module, timing in run().items():
+        print(f"{module:<8} {timing * 1e3:>8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,21 @@
+from collections.abc import Callable, Mapping
+import timeit
+
+
+NUMBER = 50
+REPEAT = 5
+
+
+def best_of(fn: Callable[[], object], number: int = NUMBER, repeat: int = REPEAT) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number
+
+
+def flatten(results: Mapping, prefix: str) -> dict[str, float]:
+    flat = {}
+    for key, value in results.items():
+        name = f'{prefix}.{key}'
+        if isinstance(value, Mapping):
+            flat.update(flatten(value, name))
+        else:
+            flat[name] = value
+    return flat
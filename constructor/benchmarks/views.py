@@ -0,0 +1,76 @@
+from collections.abc import Callable
+from itertools import chain, cycle
+
+from plugins.loan.calculator import PAYMENT_FIELDS_NAMES, Loan
+from plugins.loan.utils import render_header, render_row
+from plugins.loan.view.loan_chart import LoanChart
+from plugins.loan.view.loan_table import TABLE_COLUMN_WIDTH, LoanTable
+
+from .timing import best_of, flatten
+
+
+LOAN_AMOUNT = 12_345_678.9
+OTHER_LOAN_AMOUNT = 9_876_543.2
+INTEREST_RATE_YEARLY = 0.1675
+LOAN_TERMS_YEARS = (1, 5, 30, 50)
+NUMBER = 5
+
+
+def loan_for(loan_term_years: int, loan_amount: float = LOAN_AMOUNT) -> Loan:
+    loan = Loan()
+    loan.loan_amount, loan.interest_rate_yearly, loan.loan_term_years = loan_amount, INTEREST_RATE_YEARLY, loan_term_years
+    loan.calc()
+    return loan
+
+
+def alternating(render: Callable[[Loan], None], first: Loan, second: Loan) -> Callable[[], None]:
+    loans = cycle((first, second))
+    return lambda: render(next(loans))
+
+
+# Views pool their rows and skip unchanged ones, so re-rendering the same loan mostly measures the no-op path:
+# 'fresh' builds new views for every render, 'changed' alternates between two loans of the same term,
+# and 'unchanged' renders the same loan again.
+def render_timings(new_view: Callable[[], LoanTable | LoanChart],
+                   loans: dict[int, Loan],
+                   other_loans: dict[int, Loan]) -> dict[str, dict[int, float]]:
+    view = new_view()
+    return {
+        'fresh': {t: best_of(lambda: new_view().render(loan), number=NUMBER) for t, loan in loans.items()},
+        'changed': {
+            t: best_of(alternating(lambda loan: view.render(loan), loan, other_loans[t]), number=NUMBER)
+            for t, loan in loans.items()
+        },
+        'unchanged': {t: best_of(lambda: view.render(loan), number=NUMBER) for t, loan in loans.items()},
+    }
+
+
+# Only control construction is measured: the views are never added to a page, so nothing is sent to a client.
+def run() -> dict[str, dict]:
+    loans = {loan_term_years: loan_for(loan_term_years) for loan_term_years in LOAN_TERMS_YEARS}
+    other_loans = {loan_term_years: loan_for(loan_term_years, OTHER_LOAN_AMOUNT) for loan_term_years in LOAN_TERMS_YEARS}
+    row = [f'{x:.2f}' for x in chain([1], loans[1].get_payment(0))]
+    short_row = [f'{x:.2f}' for x in (1, 1e6, 8333.33, -79582.55, -87915.89, -967074.76)]
+    header = [n for _, n in chain([(None, '#')], PAYMENT_FIELDS_NAMES)]
+
+    return {
+        'table': render_timings(LoanTable, loans, other_loans),
+        'chart': render_timings(LoanChart, loans, other_loans),
+        'render_header': {
+            'row': best_of(lambda: render_header(row, TABLE_COLUMN_WIDTH), number=10_000),
+            'header': best_of(lambda: render_header(header, TABLE_COLUMN_WIDTH), number=10_000),
+        },
+        'render_row': {
+            'row': best_of(lambda: render_row(row, TABLE_COLUMN_WIDTH), number=10_000),
+            'short_row': best_of(lambda: render_row(short_row, TABLE_COLUMN_WIDTH), number=10_000),
+        },
+    }
+
+
+def main():
+    for name, timing in flatten(run(), 'views').items():
+        print(f"{name:<32} {timing * 1e6:>12.1f} us")
+
+
+if __name__ == '__main__':
+    main()
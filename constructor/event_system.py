@@ -1,24 +1,310 @@
+from bisect import bisect_left
+from collections.abc import Awaitable
+from functools import partial
+from typing import Callable, NamedTuple
+import asyncio
+import dataclasses
+import inspect
 import logging
-from typing import Callable
+import threading
+import time
+import weakref
+
+
+# Upper bounds of latency histogram buckets in seconds; the last bucket counts everything slower.
+LATENCY_BUCKETS = (1e-5, 1e-4, 1e-3, 1e-2, 1e-1, 1.0)
+DEFAULT_SLOW_HANDLER_SECONDS = 0.05
+DEFAULT_MAX_CONCURRENCY = 8
+
+
+@dataclasses.dataclass
+class TimingStats:
+    calls: int = 0
+    errors: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+    histogram: list[int] = dataclasses.field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+
+    @property
+    def mean_seconds(self) -> float:
+        return self.total_seconds / self.calls if self.calls else 0.0
+
+    def record(self, seconds: float, error: bool = False) -> None:
+        self.calls += 1
+        self.errors += error
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.histogram[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+    def copy(self) -> 'TimingStats':
+        return dataclasses.replace(self, histogram=list(self.histogram))
+
+
+@dataclasses.dataclass
+class EventStats(TimingStats):
+    handlers: dict[str, TimingStats] = dataclasses.field(default_factory=dict)
+
+    def copy(self) -> 'EventStats':
+        return dataclasses.replace(
+            self,
+            histogram=list(self.histogram),
+            handlers={name: stats.copy() for name, stats in self.handlers.items()},
+        )
+
+
+def handler_name(handler: Callable) -> str:
+    if isinstance(handler, WeakHandler):
+        return handler.name
+    name = getattr(handler, '__qualname__', None)
+    if name is None:
+        return repr(handler)
+    return f'{handler.__module__}.{name}'
+
+
+class WeakHandler:
+    # on_collected runs from the garbage collector, on whatever thread allocated at the time, so it must not block.
+    def __init__(self, handler: Callable, on_collected: Callable[[weakref.ref], None]):
+        self.name = handler_name(handler)
+        # A bound method is a new object on every attribute access, so it is referenced through its instance.
+        if inspect.ismethod(handler):
+            self.ref = weakref.WeakMethod(handler, on_collected)
+        else:
+            self.ref = weakref.ref(handler, on_collected)
+
+    def __call__(self, *args):
+        handler = self.ref()
+        if handler is not None:
+            return handler(*args)
+
+    def refers_to(self, handler: Callable) -> bool:
+        return self.ref() == handler
+
+    @property
+    def is_alive(self) -> bool:
+        return self.ref() is not None
+
+
+class Subscribers(NamedTuple):
+    handlers: tuple[Callable, ...] = ()
+    names: tuple[str, ...] = ()
+    is_async: tuple[bool, ...] = ()
 
 
 class EventSystem:
-    def __init__(self):
-        self.__events = {}
+    def __init__(self,
+                 instrumented: bool = False,
+                 slow_handler_seconds: float = DEFAULT_SLOW_HANDLER_SECONDS,
+                 loop: asyncio.AbstractEventLoop | None = None,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY):
+        assert max_concurrency > 0, f"Concurrency must be positive, got: {max_concurrency}"
+        # Subscribers are replaced as a whole on every change, so emit never sees a half-updated list.
+        self.__events: dict[str, Subscribers] = {}
+        self.__lock = threading.Lock()
+        self.__stats: dict[str, EventStats] | None = None
+        self.__semaphore: tuple[asyncio.AbstractEventLoop, asyncio.Semaphore] | None = None
+        self.__tasks: set[asyncio.Task] = set()
+        self.__has_collected = False
+        self.slow_handler_seconds = slow_handler_seconds
+        self.loop = loop
+        self.max_concurrency = max_concurrency
+        self.instrument(instrumented)
 
     def emit(self, event_name, *args):
-        if event_name not in self.__events:
+        if self.__has_collected:
+            self.__prune()
+        subscribers = self.__events.get(event_name)
+        if subscribers is None:
             logging.warning(f'{self.__class__.__name__}.emit({event_name}, {args}) -> Event name not found.')
             return
 
-        for handler in self.__events[event_name]:
+        # Instrumentation is a separate path, so an uninstrumented emit pays only for this check.
+        if self.__stats is not None:
+            self.__emit_instrumented(event_name, subscribers, args)
+            return
+
+        for handler in subscribers.handlers:
+            try:
+                result = handler(*args)
+                if result is not None and inspect.isawaitable(result):
+                    self.__schedule(event_name, handler_name(handler), result)
+            except Exception as e:
+                logging.warning(f'{self.__class__.__name__}.emit({event_name}, {args}) -> {e.__class__.__name__}: {e}')
+
+    def __emit_instrumented(self, event_name, subscribers: Subscribers, args) -> None:
+        event_stats = self.__event_stats(event_name)
+
+        errors = False
+        emit_started = time.perf_counter()
+        for handler, name in zip(subscribers.handlers, subscribers.names):
+            error = False
+            started = time.perf_counter()
             try:
-                handler(*args)
+                result = handler(*args)
+                if result is not None and inspect.isawaitable(result):
+                    self.__schedule(event_name, name, result)
             except Exception as e:
+                error = errors = True
                 logging.warning(f'{self.__class__.__name__}.emit({event_name}, {args}) -> {e.__class__.__name__}: {e}')
+            self.__record(event_stats, event_name, name, time.perf_counter() - started, error)
 
-    def subscribe(self, event_name, handler: Callable) -> None:
+        event_stats.record(time.perf_counter() - emit_started, errors)
+
+    async def emit_async(self, event_name, *args) -> None:
+        if self.__has_collected:
+            self.__prune()
         if event_name not in self.__events:
-            self.__events[event_name] = []
+            logging.warning(f'{self.__class__.__name__}.emit_async({event_name}, {args}) -> Event name not found.')
+            return
+
+        # Coroutine handlers run concurrently and sync ones in the default executor, at most max_concurrency at a time,
+        # so a slow subscriber delays neither the emitter nor the other subscribers.
+        subscribers = self.__events[event_name]
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        errors = await asyncio.gather(*(
+            self.__dispatch(
+                event_name, name, partial(handler, *args) if is_async else partial(loop.run_in_executor, None, handler, *args)
+            )
+            for handler, name, is_async in zip(*subscribers)
+        ))
+        if self.__stats is not None:
+            self.__event_stats(event_name).record(time.perf_counter() - started, any(errors))
+
+    # The handler is started only once a slot is free, so max_concurrency also bounds sync handlers in the executor.
+    async def __dispatch(self, event_name, name: str, start: Callable[[], Awaitable | None]) -> bool:
+        async with self.__bounded():
+            error = False
+            started = time.perf_counter()
+            try:
+                awaitable = start()
+                if awaitable is None:
+                    return False
+                await awaitable
+            except Exception as e:
+                error = True
+                logging.warning(f'{self.__class__.__name__}.emit_async({event_name}) -> {name}: '
+                                f'{e.__class__.__name__}: {e}')
+            if self.__stats is not None:
+                self.__record(self.__event_stats(event_name), event_name, name, time.perf_counter() - started, error)
+            return error
+
+    def __bounded(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self.__semaphore is None or self.__semaphore[0] is not loop:
+            self.__semaphore = (loop, asyncio.Semaphore(self.max_concurrency))
+        return self.__semaphore[1]
+
+    # A coroutine returned to the sync emit is run on the app loop instead of being dropped un-awaited.
+    def __schedule(self, event_name, name: str, awaitable: Awaitable) -> None:
+        try:
+            loop, is_loop_thread = asyncio.get_running_loop(), True
+        except RuntimeError:
+            loop, is_loop_thread = self.loop, False
+
+        if loop is None:
+            if inspect.iscoroutine(awaitable):
+                awaitable.close()
+            logging.warning(f'{self.__class__.__name__}.emit({event_name}) -> {name}: No event loop to run a coroutine.')
+            return
+
+        def create_task() -> None:
+            task = loop.create_task(self.__dispatch(event_name, name, lambda: awaitable))
+            self.__tasks.add(task)
+            task.add_done_callback(self.__tasks.discard)
+
+        if is_loop_thread:
+            create_task()
+        else:
+            loop.call_soon_threadsafe(create_task)
+
+    def __event_stats(self, event_name) -> EventStats:
+        event_stats = self.__stats.get(event_name)
+        if event_stats is None:
+            event_stats = self.__stats[event_name] = EventStats()
+        return event_stats
+
+    def __record(self, event_stats: EventStats, event_name, name: str, seconds: float, error: bool) -> None:
+        handler_stats = event_stats.handlers.get(name)
+        if handler_stats is None:
+            handler_stats = event_stats.handlers[name] = TimingStats()
+        handler_stats.record(seconds, error)
+
+        if seconds >= self.slow_handler_seconds:
+            logging.warning(f'{self.__class__.__name__}.emit({event_name}) -> '
+                            f'Slow handler {name}: {seconds * 1000:.1f} ms')
+
+    def subscribe(self, event_name, handler: Callable, weak: bool = False) -> None:
+        name = handler_name(handler)
+        is_async = inspect.iscoroutinefunction(handler)
+        if weak:
+            handler = WeakHandler(handler, self.__on_collected)
+        if self.__has_collected:
+            self.__prune()
+
+        with self.__lock:
+            subscribers = self.__events.get(event_name, Subscribers())
+            self.__events[event_name] = Subscribers(
+                handlers=(*subscribers.handlers, handler),
+                names=(*subscribers.names, name),
+                is_async=(*subscribers.is_async, is_async),
+            )
+
+    def unsubscribe(self, event_name, handler: Callable) -> bool:
+        def matches(subscribed: Callable) -> bool:
+            return subscribed == handler or isinstance(subscribed, WeakHandler) and subscribed.refers_to(handler)
+
+        return self.__remove(event_name, matches)
+
+    # Only marks that a handler died: the callback can run during an allocation inside the locked part of
+    # subscribe or __remove, so taking the lock here would deadlock. Dead handlers are pruned on the next
+    # emit or subscribe, and until then a dead WeakHandler does nothing.
+    def __on_collected(self, ref: weakref.ref) -> None:
+        self.__has_collected = True
+
+    def __prune(self) -> None:
+        with self.__lock:
+            self.__has_collected = False
+            for event_name, subscribers in self.__events.items():
+                alive = [
+                    not isinstance(handler, WeakHandler) or handler.is_alive for handler in subscribers.handlers
+                ]
+                if not all(alive):
+                    self.__events[event_name] = Subscribers(*(
+                        tuple(value for value, is_alive in zip(column, alive) if is_alive) for column in subscribers
+                    ))
+
+    # The event itself stays registered, so emitting it after the last unsubscribe is not a warning.
+    def __remove(self, event_name, matches: Callable[[Callable], bool]) -> bool:
+        with self.__lock:
+            subscribers = self.__events.get(event_name)
+            if subscribers is None:
+                return False
+
+            for n, subscribed in enumerate(subscribers.handlers):
+                if matches(subscribed):
+                    self.__events[event_name] = Subscribers(*(
+                        (*column[:n], *column[n + 1:]) for column in subscribers
+                    ))
+                    return True
+            return False
+
+    @property
+    def instrumented(self) -> bool:
+        return self.__stats is not None
+
+    def instrument(self, enabled: bool = True, slow_handler_seconds: float | None = None) -> None:
+        if slow_handler_seconds is not None:
+            self.slow_handler_seconds = slow_handler_seconds
+        if not enabled:
+            self.__stats = None
+        elif self.__stats is None:
+            self.__stats = {}
+
+    def stats(self) -> dict[str, EventStats]:
+        if self.__stats is None:
+            return {}
+        return {event_name: stats.copy() for event_name, stats in self.__stats.items()}
 
-        self.__events[event_name].append(handler)
+    def reset_stats(self) -> None:
+        if self.__stats is not None:
+            self.__stats.clear()
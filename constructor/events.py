@@ -1,3 +1,6 @@
 class Events:
     class Main:
         error = 'main.error'
+
+    class Sensitivity:
+        chunk = 'sensitivity.chunk'
@@ -1,3 +1,7 @@
+import asyncio
+import logging
+import time
+
 from flet import (
     Page,
     app,
@@ -8,23 +12,47 @@ from flet import (
     Tab,
     SnackBar,
     Text,
+    ControlEvent,
 )
 
 from event_system import EventSystem
-from plugins.register import plugins_all
+from plugins import APlugin, discover_plugins
 import constants
 from events import Events
 
 
-def add_plugins(page: Page, event_system: EventSystem) -> None:
-    logs_view_plugins = [plugin(page, event_system) for plugin in plugins_all]
+# Tabs are created from the plugin manifest; a plugin is imported, constructed and builds its container
+# only when its tab is first selected.
+def build_tabs(page: Page | None, event_system: EventSystem) -> Tabs:
+    specs = discover_plugins()
+    loaded_plugins: dict[int, APlugin] = {}
+
+    def load_plugin(index: int) -> None:
+        if index in loaded_plugins or index >= len(specs):
+            return
+        started = time.perf_counter()
+        plugin = specs[index].load()(page, event_system)
+        loaded_plugins[index] = plugin
+        tabs.tabs[index].content = plugin.container
+        logging.info(f"build_tabs: {specs[index].class_name} loaded in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    def on_change(event: ControlEvent) -> None:
+        load_plugin(tabs.selected_index)
+        tabs.update()
 
     tabs = Tabs(
-        tabs=[
-            Tab(plugin.name, plugin.container, adaptive=True)
-            for plugin in logs_view_plugins
-        ],
+        tabs=[Tab(spec.name, Container(), adaptive=True) for spec in specs],
+        selected_index=0,
+        on_change=on_change,
+        # Loaded plugins by tab index, for tools that drive a session without a flet client.
+        data=loaded_plugins,
     )
+    load_plugin(tabs.selected_index)
+    return tabs
+
+
+def add_plugins(page: Page, event_system: EventSystem) -> None:
+    tabs = build_tabs(page, event_system)
     tabs_container = Container(content=tabs,
                                bgcolor=Colors.TRANSPARENT,
                                height=constants.PAGE_HEIGHT - 60,
@@ -35,13 +63,15 @@ def add_plugins(page: Page, event_system: EventSystem) -> None:
 
 
 async def main(page: Page):
+    started = time.perf_counter()
     page.title = "Constructor"
     page.vertical_alignment = MainAxisAlignment.CENTER
     page.window.width, page.window.max_width, page.window.min_width = [constants.PAGE_WIDTH] * 3
     page.window.height, page.window.max_height, page.window.min_height = [constants.PAGE_HEIGHT] * 3
-    event_system = EventSystem()
+    event_system = EventSystem(loop=asyncio.get_running_loop())
 
-    def handle_error_message(message: str) -> None:
+    # A coroutine handler runs on the app loop, so emitting an error does not wait for the page update.
+    async def handle_error_message(message: str) -> None:
         snack_bar = SnackBar(Text(f"{message}"), open=True, duration=1000)
         page.overlay.append(snack_bar)
         page.update()
@@ -49,6 +79,8 @@ async def main(page: Page):
     event_system.subscribe(Events.Main.error, handle_error_message)
 
     add_plugins(page, event_system)
+    # Measured per session, from the session start; shown where the log level is set to INFO, as server.py does.
+    logging.info(f"main: time to first frame {(time.perf_counter() - started) * 1000:.0f} ms")
 
 
 if __name__ == '__main__':
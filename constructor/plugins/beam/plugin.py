@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from collections.abc import Callable
 from functools import partial
+import math
 
 from flet import (
 	Page,
@@ -16,7 +17,16 @@ from flet import (
 
 import constants
 
-from plugins.plugin import APlugin
+from plugins.cache import LRUCache
+from plugins.plugin import APlugin, batch_updates, request_update
+
+from .profiles import ProfileKind, profile_catalogue
+
+
+WX_CACHE_ENTRIES = 4096
+
+# Results are shared by all sessions of the process.
+wx_cache = LRUCache(max_entries=WX_CACHE_ENTRIES)
 
 
 class Line(Row):
@@ -27,18 +37,19 @@ class Line(Row):
 		super().__init__(controls=[self.name_field, self.value_field], alignment=MainAxisAlignment.SPACE_BETWEEN, *args, **kwargs)
 
 	def __on_change(self, event):
-		try:
-			self.value_field.border_color = Colors.BLACK
-			self.callback(event.data)
-		except Exception as e:
-			self.value_field.border_color = Colors.RED
-			print(e.__class__.__name__, e)
+		with batch_updates(self.page, self.__class__.__name__):
+			try:
+				self.value_field.border_color = Colors.BLACK
+				self.callback(event.data)
+			except Exception as e:
+				self.value_field.border_color = Colors.RED
+				print(e.__class__.__name__, e)
 
-		self.update()
+			request_update(self)
 
 	def set_value(self, value: float) -> None:
 		self.value_field.value = value
-		self.update()
+		request_update(self)
 
 
 class WxCalculator:
@@ -50,6 +61,9 @@ class WxCalculator:
 		result = (self.__momentum * 10 ** 3) / (self.__material_sigma * 10 ** 6)
 		return result * 10 ** 6
 
+	def inputs(self) -> tuple[float, float]:
+		return self.__momentum, self.__material_sigma
+
 	def set_momentum(self, momentum: float) -> None:
 		self.__momentum = momentum
 
@@ -65,6 +79,7 @@ class BeamPlugin(APlugin):
 		self.m_field = None
 		self.sigma_field = None
 		self.wx_field = None
+		self.profiles_field = None
 		self.calculator = WxCalculator()
 		self.container = self.build_container()
 		self.event_system = event_system
@@ -73,6 +88,7 @@ class BeamPlugin(APlugin):
 		self.m_field = Line('Момент, кH/м:', callback=partial(self.__calc, self.calculator.set_momentum))
 		self.sigma_field = Line('σ (материала), МПа:', callback=partial(self.__calc, self.calculator.set_material_sigma))
 		self.wx_field = Line('Wx, см^3:', read_only=True)
+		self.profiles_field = Text(size=12, selectable=True)
 
 		return Container(
 			content=Column(
@@ -80,6 +96,7 @@ class BeamPlugin(APlugin):
 					self.m_field,
 					self.sigma_field,
 					self.wx_field,
+					self.profiles_field,
 				],
 			),
 			width=constants.PLUGIN_CONTAINER_WIDTH,
@@ -89,10 +106,30 @@ class BeamPlugin(APlugin):
 	def __calc(self, callback: Callable[[float], None], value: str):
 		try:
 			callback(float(value) if value else 0.0)
-			result = self.calculator.calculate()
+			key = self.calculator.inputs()
+			result = wx_cache.get(key)
+			if result is None:
+				result = self.calculator.calculate()
+				wx_cache.put(key, result)
 			self.wx_field.set_value(result)
+			self.__show_profiles(result)
 		except ZeroDivisionError:
 			self.wx_field.set_value('Деление на ноль')
+			self.profiles_field.value = ''
 		except Exception as e:
 			self.wx_field.set_value(f'{self.__class__.__name__}: {e}')
-		self.container.update()
+			self.profiles_field.value = ''
+		request_update(self.container)
+
+	# The lightest standard profile of every kind that is strong enough for the required Wx.
+	def __show_profiles(self, wx: float) -> None:
+		# Zero, negative or non-finite Wx (e.g. σ = 0 or a zero moment) has no meaningful profile.
+		if not (math.isfinite(wx) and wx > 0):
+			self.profiles_field.value = ''
+			return
+		catalogue = profile_catalogue()
+		lines = []
+		for kind in ProfileKind:
+			profile = catalogue.lightest_by_wx(wx, kind)
+			lines.append(str(profile) if profile is not None else f"{kind.title}: нет профиля с Wx ≥ {wx:g} см^3")
+		self.profiles_field.value = '\n'.join(lines)
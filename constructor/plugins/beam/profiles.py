@@ -0,0 +1,89 @@
+from __future__ import annotations
+from bisect import bisect_left
+from collections.abc import Callable, Iterable
+from pathlib import Path
+import csv
+import dataclasses
+import enum
+import functools
+
+
+PROFILES_PATH = Path(__file__).with_name('profiles.csv')
+
+
+class ProfileKind(enum.Enum):
+	I_BEAM = 'I'
+	CHANNEL = 'U'
+	ANGLE = 'L'
+
+	@property
+	def title(self) -> str:
+		return {'I': 'Двутавр', 'U': 'Швеллер', 'L': 'Уголок'}[self.value]
+
+
+@dataclasses.dataclass(frozen=True)
+class Profile:
+	kind: ProfileKind
+	designation: str
+	mass: float  # kg/m
+	ix: float  # cm^4
+	wx: float  # cm^3
+
+	def __str__(self):
+		return f"{self.kind.title} {self.designation}: Wx {self.wx:g} см^3, Ix {self.ix:g} см^4, {self.mass:g} кг/м"
+
+
+# Profiles sorted by one property, with the lightest profile of every suffix, so the lightest profile whose
+# property is at least a given value is one binary search.
+class ProfileIndex:
+	def __init__(self, profiles: Iterable[Profile], key: Callable[[Profile], float]) -> None:
+		self.profiles = sorted(profiles, key=key)
+		self.keys = [key(profile) for profile in self.profiles]
+		self.lightest_from: list[Profile] = []
+		lightest = None
+		for profile in reversed(self.profiles):
+			if lightest is None or profile.mass < lightest.mass:
+				lightest = profile
+			self.lightest_from.append(lightest)
+		self.lightest_from.reverse()
+
+	def lightest(self, minimum: float) -> Profile | None:
+		n = bisect_left(self.keys, minimum)
+		return self.lightest_from[n] if n < len(self.lightest_from) else None
+
+
+class ProfileCatalogue:
+	def __init__(self, profiles: Iterable[Profile]) -> None:
+		self.profiles = tuple(profiles)
+		kinds: dict[ProfileKind | None, list[Profile]] = {None: list(self.profiles)}
+		for profile in self.profiles:
+			kinds.setdefault(profile.kind, []).append(profile)
+		self.__by_wx = {kind: ProfileIndex(profiles, lambda profile: profile.wx) for kind, profiles in kinds.items()}
+		self.__by_ix = {kind: ProfileIndex(profiles, lambda profile: profile.ix) for kind, profiles in kinds.items()}
+
+	def __len__(self):
+		return len(self.profiles)
+
+	# Lightest profile, of any kind by default, with Wx not less than required.
+	def lightest_by_wx(self, wx: float, kind: ProfileKind | None = None) -> Profile | None:
+		index = self.__by_wx.get(kind)
+		return index.lightest(wx) if index is not None else None
+
+	def lightest_by_ix(self, ix: float, kind: ProfileKind | None = None) -> Profile | None:
+		index = self.__by_ix.get(kind)
+		return index.lightest(ix) if index is not None else None
+
+
+def load_profiles(path: Path = PROFILES_PATH) -> list[Profile]:
+	with open(path, encoding='utf-8', newline='') as f:
+		rows = csv.reader(line for line in f if not line.startswith('#'))
+		return [
+			Profile(ProfileKind(kind), designation, float(mass), float(ix), float(wx))
+			for kind, designation, mass, ix, wx in rows
+		]
+
+
+# Read on the first lookup, not when the Beam tab is built; shared by all sessions of the process.
+@functools.cache
+def profile_catalogue() -> ProfileCatalogue:
+	return ProfileCatalogue(load_profiles())
@@ -0,0 +1,96 @@
+from __future__ import annotations
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any
+import dataclasses
+import sys
+import threading
+
+
+DEFAULT_MAX_BYTES = 16 * 2 ** 20
+DEFAULT_MAX_ENTRIES = 1024
+
+
+@dataclasses.dataclass(frozen=True)
+class CacheStats:
+	hits: int
+	misses: int
+	evictions: int
+	entries: int
+	nbytes: int
+	max_bytes: int
+
+	@property
+	def hit_rate(self) -> float:
+		requests = self.hits + self.misses
+		return self.hits / requests if requests else 0.0
+
+
+class LRUCache:
+	def __init__(self,
+				 max_bytes: int = DEFAULT_MAX_BYTES,
+				 max_entries: int = DEFAULT_MAX_ENTRIES,
+				 sizeof: Callable[[Any], int] = sys.getsizeof) -> None:
+		assert max_bytes > 0, f"Cache memory cap must be positive, got: {max_bytes}"
+		assert max_entries > 0, f"Cache size must be positive, got: {max_entries}"
+		self.max_bytes = max_bytes
+		self.max_entries = max_entries
+		self.__sizeof = sizeof
+		self.__items: OrderedDict[Hashable, tuple[Any, int]] = OrderedDict()
+		self.__nbytes = 0
+		self.__hits = 0
+		self.__misses = 0
+		self.__evictions = 0
+		self.__lock = threading.Lock()
+
+	def __len__(self):
+		return len(self.__items)
+
+	def __contains__(self, key: Hashable) -> bool:
+		return key in self.__items
+
+	def get(self, key: Hashable, default: Any = None) -> Any:
+		with self.__lock:
+			item = self.__items.get(key)
+			if item is None:
+				self.__misses += 1
+				return default
+			self.__items.move_to_end(key)
+			self.__hits += 1
+			return item[0]
+
+	def put(self, key: Hashable, value: Any) -> None:
+		nbytes = self.__sizeof(value)
+		if nbytes > self.max_bytes:
+			return
+
+		with self.__lock:
+			if key in self.__items:
+				self.__nbytes -= self.__items.pop(key)[1]
+			self.__items[key] = (value, nbytes)
+			self.__nbytes += nbytes
+
+			while self.__nbytes > self.max_bytes or len(self.__items) > self.max_entries:
+				_, (_, evicted_nbytes) = self.__items.popitem(last=False)
+				self.__nbytes -= evicted_nbytes
+				self.__evictions += 1
+
+	def clear(self) -> None:
+		with self.__lock:
+			self.__items.clear()
+			self.__nbytes = 0
+
+	def stats(self) -> CacheStats:
+		with self.__lock:
+			return CacheStats(
+				hits=self.__hits,
+				misses=self.__misses,
+				evictions=self.__evictions,
+				entries=len(self.__items),
+				nbytes=self.__nbytes,
+				max_bytes=self.max_bytes,
+			)
+
+	def reset_stats(self) -> None:
+		with self.__lock:
+			self.__hits = self.__misses = self.__evictions = 0
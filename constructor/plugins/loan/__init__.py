@@ -1,3 +1,7 @@
-from .plugin import *
-from .calculator import test
-test()
+# The plugin, and with it flet, is imported on first use, so the headless calculator and
+# `python -m plugins.loan` load only the calculator and numpy.
+def __getattr__(name):
+    if name == 'LoanPlugin':
+        from .plugin import LoanPlugin
+        return LoanPlugin
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
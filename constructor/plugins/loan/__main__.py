@@ -0,0 +1,36 @@
+import argparse
+import logging
+
+from .batch import CHUNK_BYTES, InvalidHeader, price_file
+from . import calculator, refinance, topup
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m plugins.loan', description='Headless loan calculator.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    batch = commands.add_parser('batch', help='Price a CSV file of loans: loan_amount, interest_rate_yearly (%%), loan_term_years.')
+    batch.add_argument('input', help='Input CSV file with a header row.')
+    batch.add_argument('output', help='Output CSV file.')
+    batch.add_argument('-j', '--workers', type=int, default=None, help='Number of worker processes, all cores by default.')
+    batch.add_argument('--chunk-bytes', type=int, default=CHUNK_BYTES, help='Size of the input chunk sent to a worker.')
+    batch.add_argument('-v', '--verbose', action='store_true', help='Log progress.')
+
+    commands.add_parser('test', help='Run the calculator, top-up and refinance self-checks.')
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO if getattr(args, 'verbose', False) else logging.WARNING)
+
+    if args.command == 'batch':
+        try:
+            print(price_file(args.input, args.output, workers=args.workers, chunk_bytes=args.chunk_bytes))
+        except InvalidHeader as e:
+            parser.error(f"{args.input}: {e}")
+    elif args.command == 'test':
+        for module in (calculator, topup, refinance):
+            module.test()
+        print('Calculator self-check passed.')
+
+
+if __name__ == '__main__':
+    main()
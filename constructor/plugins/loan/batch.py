@@ -0,0 +1,155 @@
+from __future__ import annotations
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+import csv
+import dataclasses
+import io
+import logging
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from .calculator import NUMBER_OF_MONTHS_IN_YEAR, calc_payments
+from .utils import validate_pos_float, validate_pos_int, validate_pos_percent
+
+
+INPUT_FIELDS = (
+    ('loan_amount', validate_pos_float),
+    ('interest_rate_yearly', validate_pos_percent),
+    ('loan_term_years', validate_pos_int),
+)
+OUTPUT_FIELDS = ('payment', 'total_payment', 'total_interest', 'error')
+CHUNK_BYTES = 4 * 2 ** 20
+TASKS_PER_WORKER = 2
+WRITE_BUFFER_SIZE = 2 ** 20
+
+
+class InvalidHeader(ValueError):
+    pass
+
+
+@dataclasses.dataclass(frozen=True)
+class ChunkResult:
+    path: str
+    rows: int
+    errors: int
+
+
+@dataclasses.dataclass(frozen=True)
+class BatchReport:
+    rows: int
+    errors: int
+    seconds: float
+    workers: int
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        return (
+            f"{self.rows} rows ({self.errors} invalid) in {self.seconds:.2f} s: "
+            f"{self.rows_per_second:.0f} rows/s on {self.workers} workers"
+        )
+
+
+def read_header(path: str | Path) -> str:
+    with open(path, 'rb') as f:
+        return f.readline().decode('utf-8-sig').strip()
+
+
+# Checked once before the pool starts and the output is opened, so a bad header fails fast with no output.
+def validate_header(header: str) -> None:
+    columns = next(csv.reader([header]), [])
+    missing = [k for k, _ in INPUT_FIELDS if k not in columns]
+    if missing:
+        raise InvalidHeader(f"Missing input columns: {', '.join(missing)}; header is: {header!r}")
+
+
+def read_chunks(path: str | Path, chunk_bytes: int = CHUNK_BYTES) -> Iterator[tuple[str, bytes]]:
+    with open(path, 'rb') as f:
+        header = f.readline().decode('utf-8-sig').strip()
+        while True:
+            chunk = f.read(chunk_bytes)
+            if not chunk:
+                break
+            # Chunks end on a line boundary so that workers never see a partial row.
+            yield header, chunk + f.readline()
+
+
+def price_chunk(header: str, chunk: bytes, path: str) -> ChunkResult:
+    columns = next(csv.reader([header]))
+    indexes = [columns.index(k) for k, _ in INPUT_FIELDS]
+    rows = [row for row in csv.reader(io.StringIO(chunk.decode('utf-8'))) if any(field.strip() for field in row)]
+
+    values = np.zeros((len(rows), len(INPUT_FIELDS)), dtype=np.float64)
+    errors = [''] * len(rows)
+    for n, row in enumerate(rows):
+        try:
+            for m, ((_, validator), index) in enumerate(zip(INPUT_FIELDS, indexes)):
+                values[n, m] = validator(row[index])
+        except (AssertionError, IndexError) as e:
+            errors[n] = f"{e.__class__.__name__}: {e}"
+
+    loan_amounts, interest_rates_yearly, loan_terms_years = values.T
+    payments = calc_payments(loan_amounts, interest_rates_yearly, loan_terms_years)
+    total_payments = payments * loan_terms_years * NUMBER_OF_MONTHS_IN_YEAR
+    total_interest = total_payments - loan_amounts
+
+    with open(path, 'w', newline='', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as f:
+        writer = csv.writer(f)
+        for row, payment, total_payment, interest, error in zip(
+            rows, payments.tolist(), total_payments.tolist(), total_interest.tolist(), errors
+        ):
+            if error:
+                writer.writerow([*row, '', '', '', error])
+            else:
+                writer.writerow([*row, f'{payment:.2f}', f'{total_payment:.2f}', f'{interest:.2f}', ''])
+
+    return ChunkResult(path=path, rows=len(rows), errors=sum(1 for e in errors if e))
+
+
+def price_file(input_path: str | Path,
+               output_path: str | Path,
+               workers: int | None = None,
+               chunk_bytes: int = CHUNK_BYTES) -> BatchReport:
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    rows = errors = 0
+    header = read_header(input_path)
+    if header:
+        validate_header(header)
+
+    with tempfile.TemporaryDirectory(dir=Path(output_path).parent) as parts_dir, \
+            ProcessPoolExecutor(max_workers=workers) as executor, \
+            open(output_path, 'wb') as output:
+        in_flight: deque[Future] = deque()
+        if header:
+            output.write((header + ',' + ','.join(OUTPUT_FIELDS) + '\r\n').encode('utf-8'))
+
+        def write_oldest() -> None:
+            nonlocal rows, errors
+            result: ChunkResult = in_flight.popleft().result()
+            with open(result.path, 'rb') as part:
+                shutil.copyfileobj(part, output, WRITE_BUFFER_SIZE)
+            os.remove(result.path)
+            rows += result.rows
+            errors += result.errors
+            logging.info(f"price_file: {rows} rows, {rows / (time.perf_counter() - started):.0f} rows/s")
+
+        # Workers write their chunks to separate part files; parts are appended in input order,
+        # with a bounded number of chunks in flight so memory does not grow with the input size.
+        for n, (header, chunk) in enumerate(read_chunks(input_path, chunk_bytes)):
+            if len(in_flight) >= TASKS_PER_WORKER * workers:
+                write_oldest()
+            in_flight.append(executor.submit(price_chunk, header, chunk, os.path.join(parts_dir, f'{n}.csv')))
+
+        while in_flight:
+            write_oldest()
+
+    return BatchReport(rows=rows, errors=errors, seconds=time.perf_counter() - started, workers=workers)
@@ -0,0 +1,26 @@
+from __future__ import annotations
+import threading
+
+from plugins.cache import DEFAULT_MAX_BYTES, DEFAULT_MAX_ENTRIES, LRUCache
+
+
+SHARED_MAX_BYTES = 256 * 2 ** 20
+SHARED_MAX_ENTRIES = 65536
+
+
+class ScheduleCache(LRUCache):
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        super().__init__(max_bytes=max_bytes, max_entries=max_entries, sizeof=lambda schedule: schedule.nbytes)
+
+
+_shared_schedule_cache: ScheduleCache | None = None
+_shared_schedule_cache_lock = threading.Lock()
+
+
+# Schedules are immutable, so one process-wide cache serves every session of a web server.
+def shared_schedule_cache() -> ScheduleCache:
+    global _shared_schedule_cache
+    with _shared_schedule_cache_lock:
+        if _shared_schedule_cache is None:
+            _shared_schedule_cache = ScheduleCache(max_bytes=SHARED_MAX_BYTES, max_entries=SHARED_MAX_ENTRIES)
+        return _shared_schedule_cache
@@ -1,12 +1,22 @@
-from copy import copy
+from __future__ import annotations
+from abc import ABC, abstractmethod
 from collections.abc import Mapping
 import dataclasses
+import functools
+import math
+
+import numpy as np
+
+from .cache import ScheduleCache
+from .exact import KOPECKS_IN_ROUBLE, calc_decimal, calc_kopecks, to_kopecks, to_ratio
 
 
 class NotReadyToCalculate(AssertionError):
     pass
 
 
+NUMBER_OF_MONTHS_IN_YEAR = 12
+
 PAYMENT_FIELDS_NAMES = (
     ('loan_amount', 'Кредит, руб'),
     ('payment_percents', 'Ежемесячный платеж начисленные проценты, руб'),
@@ -16,13 +26,12 @@ PAYMENT_FIELDS_NAMES = (
 )
 
 
-@dataclasses.dataclass
 class Payment:
-    loan_amount: float
-    payment_percents: float
-    payment_dept: float
-    payment: float
-    remaining_payment: float = 0.0
+    __slots__ = ('__schedule', '__n')
+
+    def __init__(self, schedule: ASchedule, n: int) -> None:
+        self.__schedule = schedule
+        self.__n = n
 
     def __str__(self):
         return " | ".join(["{:12.2f}".format(self[k]) for k, _ in PAYMENT_FIELDS_NAMES])
@@ -37,18 +46,358 @@ class Payment:
         return iter((self[k] for k, _ in PAYMENT_FIELDS_NAMES))
 
     def __copy__(self):
-        return dataclasses.replace(self)
+        return self
 
     def __getitem__(self, item):
-        return self.__dict__[item]
+        return self.__schedule.value(item, self.__n)
+
+    def __getattr__(self, item):
+        try:
+            if item.startswith('_'):
+                raise KeyError(item)
+            return self[item]
+        except KeyError:
+            raise AttributeError(f"{self.__class__.__name__!r} object has no attribute {item!r}") from None
+
+
+class ASchedule(ABC):
+    __slots__ = ()
+
+    def __getitem__(self, item: int) -> Payment:
+        number_of_payments = len(self)
+        if item < 0:
+            item += number_of_payments
+        if not 0 <= item < number_of_payments:
+            raise IndexError(f"{self.__class__.__name__} index out of range: {item}")
+        return Payment(self, item)
+
+    def __iter__(self):
+        return (Payment(self, n) for n in range(len(self)))
+
+    @abstractmethod
+    def __len__(self):
+        ...
+
+    @abstractmethod
+    def value(self, field_id: str, n: int) -> float:
+        ...
+
+    @abstractmethod
+    def column(self, field_id: str) -> np.ndarray:
+        ...
+
+    @property
+    @abstractmethod
+    def nbytes(self) -> int:
+        ...
+
+
+class Schedule(ASchedule):
+    __slots__ = ('__columns', '__number_of_payments')
+
+    def __init__(self, columns: Mapping[str, np.ndarray] | None = None) -> None:
+        self.__columns = {}
+        for k, _ in PAYMENT_FIELDS_NAMES:
+            column = np.asarray(columns[k] if columns else (), dtype=np.float64)
+            column.flags.writeable = False
+            self.__columns[k] = column
+        self.__number_of_payments = len(self.__columns[PAYMENT_FIELDS_NAMES[0][0]])
+
+    def __len__(self):
+        return self.__number_of_payments
+
+    def value(self, field_id: str, n: int) -> float:
+        return float(self.__columns[field_id][n])
+
+    def column(self, field_id: str) -> np.ndarray:
+        return self.__columns[field_id]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(c.nbytes for c in self.__columns.values())
+
+
+class ExactSchedule(ASchedule):
+    __slots__ = ('__kopecks', '__columns', '__number_of_payments')
+
+    def __init__(self, kopecks: Mapping[str, np.ndarray] | None = None) -> None:
+        self.__kopecks = {}
+        for k, _ in PAYMENT_FIELDS_NAMES:
+            column = np.array(kopecks[k] if kopecks else (), dtype=np.int64)
+            column.flags.writeable = False
+            self.__kopecks[k] = column
+        self.__columns = {}
+        self.__number_of_payments = len(self.__kopecks[PAYMENT_FIELDS_NAMES[0][0]])
+
+    def __len__(self):
+        return self.__number_of_payments
+
+    def value(self, field_id: str, n: int) -> float:
+        return int(self.__kopecks[field_id][n]) / KOPECKS_IN_ROUBLE
+
+    def kopecks(self, field_id: str) -> np.ndarray:
+        return self.__kopecks[field_id]
+
+    def column(self, field_id: str) -> np.ndarray:
+        if field_id not in self.__columns:
+            column = self.__kopecks[field_id] / KOPECKS_IN_ROUBLE
+            column.flags.writeable = False
+            self.__columns[field_id] = column
+        return self.__columns[field_id]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(c.nbytes for c in self.__kopecks.values()) + sum(c.nbytes for c in self.__columns.values())
+
+
+class LazySchedule(ASchedule):
+    __slots__ = ('__annuity', '__schedule')
+
+    def __init__(self, annuity: Annuity) -> None:
+        self.__annuity = annuity
+        self.__schedule: Schedule | None = None
+
+    def __len__(self):
+        return self.__annuity.number_of_payments
+
+    def value(self, field_id: str, n: int) -> float:
+        return self.__annuity.value(field_id, n)
+
+    def column(self, field_id: str) -> np.ndarray:
+        if self.__schedule is None:
+            self.__schedule = self.__annuity.schedule()
+        return self.__schedule.column(field_id)
+
+    @property
+    def nbytes(self) -> int:
+        return self.__schedule.nbytes if self.__schedule is not None else 0
+
+
+@dataclasses.dataclass(frozen=True)
+class LoanSummary:
+    payment: float
+    number_of_payments: int
+    total_payment: float
+    total_interest: float
+
+
+@dataclasses.dataclass(frozen=True)
+class Annuity:
+    loan_amount: float
+    interest_rate_monthly: float
+    number_of_payments: int
+
+    @classmethod
+    def of(cls, loan_amount: float, interest_rate_yearly: float, loan_term_years: int) -> Annuity:
+        assert loan_term_years >= 0, "Loan term must not be negative"
+        return cls(
+            loan_amount=loan_amount,
+            interest_rate_monthly=interest_rate_yearly / NUMBER_OF_MONTHS_IN_YEAR,
+            number_of_payments=loan_term_years * NUMBER_OF_MONTHS_IN_YEAR,
+        )
+
+    @functools.cached_property
+    def _log_growth(self) -> float:
+        return math.log1p(self.interest_rate_monthly)
+
+    @functools.cached_property
+    def _full_minus_one(self) -> float:
+        return math.expm1(self.number_of_payments * self._log_growth)
+
+    @functools.cached_property
+    def payment(self) -> float:
+        if self.number_of_payments == 0:
+            return 0.0
+        if self.interest_rate_monthly == 0.0:
+            return self.loan_amount / self.number_of_payments
+        return self.loan_amount * self.interest_rate_monthly * (self._full_minus_one + 1.0) / self._full_minus_one
+
+    def balance(self, month: int) -> float:
+        # Nothing is paid off over an empty term.
+        if self.number_of_payments == 0:
+            return self.loan_amount
+        if self.interest_rate_monthly == 0.0:
+            return self.loan_amount - self.payment * month
+        growth = math.exp(month * self._log_growth)
+        return self.loan_amount * (self._full_minus_one + 1.0 - growth) / self._full_minus_one
+
+    def value(self, field_id: str, month: int) -> float:
+        if field_id == 'payment':
+            return -self.payment
+        if field_id == 'remaining_payment':
+            return self.payment * (month - (self.number_of_payments - 1))
+
+        balance = self.balance(month)
+        if field_id == 'loan_amount':
+            return balance
+        if field_id == 'payment_percents':
+            return balance * self.interest_rate_monthly
+        if field_id == 'payment_dept':
+            return balance * self.interest_rate_monthly - self.payment
+        raise KeyError(field_id)
+
+    def summary(self) -> LoanSummary:
+        total_payment = self.payment * self.number_of_payments
+        return LoanSummary(
+            payment=self.payment,
+            number_of_payments=self.number_of_payments,
+            total_payment=total_payment,
+            total_interest=total_payment - self.loan_amount if self.number_of_payments else 0.0,
+        )
+
+    def schedule(self) -> Schedule:
+        if self.number_of_payments == 0:
+            return Schedule()
+
+        columns = {k: np.empty(self.number_of_payments, dtype=np.float64) for k, _ in PAYMENT_FIELDS_NAMES}
+        _calc_block(
+            {k: v.reshape(1, self.number_of_payments) for k, v in columns.items()},
+            np.array([[self.loan_amount]], dtype=np.float64),
+            np.array([[self.interest_rate_monthly]], dtype=np.float64),
+            self.number_of_payments,
+        )
+        return Schedule(columns)
+
+
+@dataclasses.dataclass(frozen=True)
+class PaymentsBatch:
+    starts: np.ndarray
+    stops: np.ndarray
+    columns: dict[str, np.ndarray]
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, item: str) -> np.ndarray:
+        return self.columns[item]
+
+    def number_of_payments(self) -> np.ndarray:
+        return self.stops - self.starts
+
+    def schedule(self, n: int) -> dict[str, np.ndarray]:
+        rows = slice(self.starts[n], self.stops[n])
+        return {k: v[rows] for k, v in self.columns.items()}
+
+
+def calc_columns(loan_amounts, interest_rates_yearly, loan_terms_years) -> PaymentsBatch:
+    loan_amounts, interest_rates_yearly, loan_terms_years = np.broadcast_arrays(
+        np.asarray(loan_amounts, dtype=np.float64),
+        np.asarray(interest_rates_yearly, dtype=np.float64),
+        np.asarray(loan_terms_years, dtype=np.int64),
+    )
+    loan_amounts = loan_amounts.ravel()
+    interest_rates_yearly = interest_rates_yearly.ravel()
+    loan_terms_years = loan_terms_years.ravel()
+    assert (loan_terms_years >= 0).all(), "Loan term must not be negative"
+
+    numbers_of_payments = loan_terms_years * NUMBER_OF_MONTHS_IN_YEAR
+    interest_rates_monthly = interest_rates_yearly / NUMBER_OF_MONTHS_IN_YEAR
+
+    # Loans are laid out grouped by term, so all schedules of one term form a dense
+    # (loans x months) block of every column and are computed with broadcasting.
+    order = np.argsort(numbers_of_payments, kind='stable')
+    sorted_starts = np.zeros(len(order) + 1, dtype=np.int64)
+    np.cumsum(numbers_of_payments[order], out=sorted_starts[1:])
+    starts = np.empty(len(order), dtype=np.int64)
+    starts[order] = sorted_starts[:-1]
+
+    columns = {k: np.empty(sorted_starts[-1], dtype=np.float64) for k, _ in PAYMENT_FIELDS_NAMES}
+    terms, first_loans, numbers_of_loans = np.unique(
+        numbers_of_payments[order], return_index=True, return_counts=True
+    )
+
+    for term, first_loan, number_of_loans in zip(terms.tolist(), first_loans.tolist(), numbers_of_loans.tolist()):
+        if term == 0:
+            continue
+        loans = order[first_loan:first_loan + number_of_loans]
+        rows = slice(sorted_starts[first_loan], sorted_starts[first_loan + number_of_loans])
+        block = {k: v[rows].reshape(number_of_loans, term) for k, v in columns.items()}
+        _calc_block(block, loan_amounts[loans, None], interest_rates_monthly[loans, None], term)
+
+    return PaymentsBatch(starts=starts, stops=starts + numbers_of_payments, columns=columns)
+
+
+def calc_exact(loan_amount, interest_rate_yearly, loan_term_years) -> ExactSchedule:
+    assert loan_term_years >= 0, "Loan term must not be negative"
+    return ExactSchedule(calc_kopecks(
+        to_kopecks(loan_amount),
+        to_ratio(interest_rate_yearly, NUMBER_OF_MONTHS_IN_YEAR),
+        loan_term_years * NUMBER_OF_MONTHS_IN_YEAR,
+    ))
+
+
+def calc_payments(loan_amounts, interest_rates_yearly, loan_terms_years) -> np.ndarray:
+    return calc_monthly_payments(
+        loan_amounts,
+        np.asarray(interest_rates_yearly, dtype=np.float64) / NUMBER_OF_MONTHS_IN_YEAR,
+        np.asarray(loan_terms_years, dtype=np.int64) * NUMBER_OF_MONTHS_IN_YEAR,
+    )
+
+
+def calc_monthly_payments(loan_amounts, interest_rates_monthly, numbers_of_payments) -> np.ndarray:
+    loan_amounts = np.asarray(loan_amounts, dtype=np.float64)
+    interest_rates_monthly = np.asarray(interest_rates_monthly, dtype=np.float64)
+    numbers_of_payments = np.asarray(numbers_of_payments, dtype=np.int64)
+    assert (numbers_of_payments >= 0).all(), "Number of payments must not be negative"
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        full_minus_one = np.expm1(numbers_of_payments * np.log1p(interest_rates_monthly))
+        payments = np.where(
+            interest_rates_monthly == 0.0,
+            loan_amounts / numbers_of_payments,
+            loan_amounts * interest_rates_monthly * (full_minus_one + 1.0) / full_minus_one,
+        )
+    return np.where(numbers_of_payments == 0, 0.0, payments)
+
+
+def _calc_block(block: dict[str, np.ndarray],
+                amount: np.ndarray,
+                rate: np.ndarray,
+                term: int,
+                growth: np.ndarray | None = None) -> None:
+    # Closed form of the annuity schedule: with g = (1 + r) ** month and f = (1 + r) ** term
+    # the balance is L * (f - g) / (f - 1) and the principal part is L * r * g / (f - 1),
+    # so everything except g is computed once per loan and only g is computed per row.
+    month = np.arange(term, dtype=np.float64)
+    is_zero_rate = rate[:, 0] == 0.0
+    log_growth = np.log1p(rate)
+    full_minus_one = np.expm1(term * log_growth)
+    full_minus_one[is_zero_rate] = 1.0
+    balance_factor = amount / full_minus_one
+    dept_factor = balance_factor * rate
+    annuity = dept_factor + amount * rate
+
+    if growth is None:
+        growth = block['payment_percents']
+        np.multiply(log_growth, month, out=growth)
+        np.exp(growth, out=growth)
+    np.multiply(growth, -dept_factor, out=block['payment_dept'])
+    np.multiply(growth, balance_factor, out=block['loan_amount'])
+    np.subtract(balance_factor * (full_minus_one + 1.0), block['loan_amount'], out=block['loan_amount'])
+
+    if is_zero_rate.any():
+        # Zero rate is the limit of the same expressions: a linear repayment of L / term a month.
+        annuity[is_zero_rate] = amount[is_zero_rate] / term
+        block['payment_dept'][is_zero_rate] = -annuity[is_zero_rate]
+        block['loan_amount'][is_zero_rate] = amount[is_zero_rate] - annuity[is_zero_rate] * month
+
+    block['payment'][...] = -annuity
+    np.subtract(block['payment_dept'], block['payment'], out=block['payment_percents'])
+    np.multiply(annuity, month - (term - 1.0), out=block['remaining_payment'])
 
 
 class Loan:
-    def __init__(self) -> None:
+    def __init__(self, cache: ScheduleCache | None = None, lazy: bool = False, exact: bool = False) -> None:
         self.loan_amount = None
         self.interest_rate_yearly = None
         self.loan_term_years = None
-        self.__payments = []
+        self.cache = cache
+        self.lazy = lazy
+        self.exact = exact
+        self.__schedule: ASchedule = Schedule()
+        self.__calculated = (None, None, None)
+        self.__growth_rate = None
+        self.__growth = np.empty(0)
 
     def __str__(self):
         return (
@@ -60,41 +409,79 @@ class Loan:
         )
 
     def __getitem__(self, item):
-        return self.__payments[item]
+        return self.__schedule[item]
 
     def __len__(self):
-        return len(self.__payments)
+        return len(self.__schedule)
 
     def calc(self):
         if not self.is_ready():
             raise NotReadyToCalculate(f"Not ready to calculate: {self}")
 
-        self.__payments.clear()
+        key = (self.loan_amount, self.interest_rate_yearly, self.loan_term_years)
+
+        if self.exact:
+            self.__schedule = calc_exact(*key)
+            self.__calculated = (None, None, None)
+            return
+
+        if self.lazy:
+            self.__schedule = LazySchedule(Annuity.of(*key))
+            self.__calculated = key
+            return
+
+        schedule = self.cache.get(key) if self.cache is not None else None
+
+        if schedule is None:
+            schedule = self.__update_schedule(*key)
+            if self.cache is not None:
+                self.cache.put(key, schedule)
+
+        self.__schedule = schedule
+        self.__calculated = key
+
+    def __update_schedule(self, loan_amount, interest_rate_yearly, loan_term_years) -> Schedule:
+        calculated_amount, calculated_rate, calculated_term = self.__calculated
+
+        # Every column is linear in the principal, so a new amount only rescales the current schedule.
+        if calculated_amount and (interest_rate_yearly, loan_term_years) == (calculated_rate, calculated_term):
+            scale = loan_amount / calculated_amount
+            return Schedule({k: self.__schedule.column(k) * scale for k, _ in PAYMENT_FIELDS_NAMES})
+
+        number_of_payments = loan_term_years * NUMBER_OF_MONTHS_IN_YEAR
+        assert number_of_payments >= 0, "Loan term must not be negative"
+        if number_of_payments == 0:
+            return Schedule()
+
+        # A new term changes the annuity and with it every row, but the growth factors (1 + r) ** month
+        # only depend on the rate, so they are extended or truncated instead of recomputed.
+        interest_rate_monthly = interest_rate_yearly / NUMBER_OF_MONTHS_IN_YEAR
+        columns = {k: np.empty(number_of_payments, dtype=np.float64) for k, _ in PAYMENT_FIELDS_NAMES}
+        _calc_block(
+            {k: v.reshape(1, number_of_payments) for k, v in columns.items()},
+            np.array([[loan_amount]], dtype=np.float64),
+            np.array([[interest_rate_monthly]], dtype=np.float64),
+            number_of_payments,
+            self.__growth_factors(interest_rate_monthly, number_of_payments),
+        )
+        return Schedule(columns)
 
-        loan_amount = self.loan_amount
-        interest_rate_yearly = self.interest_rate_yearly
-        loan_term_years = self.loan_term_years
+    def __growth_factors(self, interest_rate_monthly: float, number_of_payments: int) -> np.ndarray:
+        if interest_rate_monthly != self.__growth_rate:
+            self.__growth_rate = interest_rate_monthly
+            self.__growth = np.empty(0)
 
-        number_of_months_in_year = 12
-        number_of_payments = loan_term_years * number_of_months_in_year
-        interest_rate_monthly = interest_rate_yearly / number_of_months_in_year
+        if len(self.__growth) < number_of_payments:
+            extra = np.arange(len(self.__growth), number_of_payments, dtype=np.float64)
+            extra *= np.log1p(interest_rate_monthly)
+            np.exp(extra, out=extra)
+            self.__growth = np.concatenate((self.__growth, extra))
 
-        for payments_left in range(number_of_payments, 0, -1):
-            payment_percents = loan_amount * interest_rate_monthly
-            payment_dept = loan_amount * (interest_rate_monthly / (1 - ((1 + interest_rate_monthly) ** payments_left)))
-            payment = Payment(
-                loan_amount=loan_amount,
-                payment_percents=payment_percents,
-                payment_dept=payment_dept,
-                payment=payment_dept - payment_percents
-            )
-            loan_amount += payment_dept
-            self.__payments.append(payment)
+        return self.__growth[:number_of_payments]
 
-        remaining_payment = 0
-        for payment in reversed(self.__payments):
-            payment.remaining_payment = remaining_payment
-            remaining_payment += payment.payment
+    @staticmethod
+    def calc_many(loan_amounts, interest_rates_yearly, loan_terms_years) -> PaymentsBatch:
+        return calc_columns(loan_amounts, interest_rates_yearly, loan_terms_years)
 
     def set_loan_amount(self, value: float) -> None:
         self.loan_amount = value
@@ -116,13 +503,30 @@ class Loan:
         )
 
     def get_payment(self, n: int) -> Payment:
-        return copy(self.__payments[n])
+        return self.__schedule[n]
 
     def number_of_payments(self) -> int:
-        return len(self.__payments)
+        return len(self.__schedule)
+
+    def schedule(self) -> ASchedule:
+        return self.__schedule
+
+    def summary(self) -> LoanSummary:
+        return self.__annuity().summary()
+
+    def remaining_balance(self, month: int) -> float:
+        return self.__annuity().balance(month)
+
+    def __annuity(self) -> Annuity:
+        if not self.is_ready():
+            raise NotReadyToCalculate(f"Not ready to calculate: {self}")
+        return Annuity.of(self.loan_amount, self.interest_rate_yearly, self.loan_term_years)
+
+    def column(self, field_id: str) -> np.ndarray:
+        return self.__schedule.column(field_id)
 
     def print(self):
-        for payment in self.__payments:
+        for payment in self.__schedule:
             print(payment)
 
 
@@ -224,6 +628,43 @@ def test():
         a = tuple(round(x, 2) for x in loan_payment)[:len(test_case)]
         assert a == test_case, f'{a} != {test_case}'
 
+    lazy_loan = Loan(lazy=True)
+    lazy_loan.loan_amount, lazy_loan.interest_rate_yearly, lazy_loan.loan_term_years = 900_000.0, 0.367, 5
+    lazy_loan.calc()
+    for test_case, loan_payment in zip(payments, CustomIterator(lazy_loan)):
+        a = tuple(round(x, 2) for x in loan_payment)[:len(test_case)]
+        assert a == test_case, f'{a} != {test_case}'
+    summary = lazy_loan.summary()
+    assert abs(summary.total_payment + payments[0][3] + payments[0][4]) < 0.01, f'{summary}'
+    assert abs(summary.total_interest - summary.total_payment + payments[0][0]) < 0.01, f'{summary}'
+    assert lazy_loan.schedule().nbytes == 0
+
+    exact_loan = Loan(exact=True)
+    exact_loan.loan_amount, exact_loan.interest_rate_yearly, exact_loan.loan_term_years = 900_000.0, 0.367, 5
+    exact_loan.calc()
+    exact_schedule = exact_loan.schedule()
+    decimal_schedule = calc_decimal(900_000.0, to_ratio(0.367, NUMBER_OF_MONTHS_IN_YEAR), len(payments))
+    for k, _ in PAYMENT_FIELDS_NAMES:
+        a = [int(x) for x in exact_schedule.kopecks(k)]
+        b = [int(x * KOPECKS_IN_ROUBLE) for x in decimal_schedule[k]]
+        assert a == b, f'{k}: {a} != {b}'
+    assert -exact_schedule.kopecks('payment_dept').sum() == to_kopecks(900_000.0)
+    assert exact_schedule.kopecks('payment')[0] == round(payments[0][3] * KOPECKS_IN_ROUBLE)
+
+    empty_loan = Loan()
+    empty_loan.loan_amount, empty_loan.interest_rate_yearly, empty_loan.loan_term_years = 900_000.0, 0.367, 0
+    empty_loan.calc()
+    assert empty_loan.number_of_payments() == 0
+    assert empty_loan.remaining_balance(0) == 900_000.0
+    assert empty_loan.summary().total_payment == 0.0
+
+    batch = Loan.calc_many([1.0, 900_000.0], [0.1, 0.367], [1, 5])
+    assert batch.number_of_payments().tolist() == [12, len(payments)]
+    batch_payments = zip(*(batch.schedule(1)[k] for k, _ in PAYMENT_FIELDS_NAMES))
+    for test_case, batch_payment in zip(payments, batch_payments):
+        a = tuple(round(float(x), 2) for x in batch_payment)[:len(test_case)]
+        assert a == test_case, f'{a} != {test_case}'
+
 
 def main():
     """
@@ -0,0 +1,124 @@
+from __future__ import annotations
+from decimal import Decimal, ROUND_HALF_EVEN, localcontext
+from typing import Any
+import math
+
+import numpy as np
+
+
+KOPECKS_IN_ROUBLE = 100
+DECIMAL_PRECISION = 50
+
+
+def to_ratio(value: Any, denominator: int = 1) -> tuple[int, int]:
+    # str() of a float is its shortest round-trip repr, so 0.367 becomes exactly 367/1000.
+    numerator, value_denominator = Decimal(str(value)).as_integer_ratio()
+    denominator *= value_denominator
+    divisor = math.gcd(numerator, denominator)
+    return numerator // divisor, denominator // divisor
+
+
+def to_kopecks(value: Any) -> int:
+    numerator, denominator = to_ratio(value)
+    return div_round_half_even(numerator * KOPECKS_IN_ROUBLE, denominator)
+
+
+def div_round_half_even(numerator: int, denominator: int) -> int:
+    quotient, remainder = divmod(numerator, denominator)
+    remainder *= 2
+    if remainder > denominator or (remainder == denominator and quotient % 2):
+        quotient += 1
+    return quotient
+
+
+def calc_kopecks(loan_amount: int,
+                 interest_rate_monthly: tuple[int, int],
+                 number_of_payments: int) -> dict[str, np.ndarray]:
+    assert number_of_payments >= 0, "Number of payments must not be negative"
+    p, q = interest_rate_monthly
+
+    if not number_of_payments:
+        payment = 0
+    elif not p:
+        payment = div_round_half_even(loan_amount, number_of_payments)
+    else:
+        # Annuity L * r * (1 + r) ** n / ((1 + r) ** n - 1) with r = p / q, exact in integers and rounded once.
+        growth = (q + p) ** number_of_payments
+        payment = div_round_half_even(loan_amount * p * growth, q * (growth - q ** number_of_payments))
+
+    # Only the balance recurrence is sequential. The loop does one integer divmod per month, with banking
+    # rounding of the interest folded in as round-half-up of (2 * B * p + q) / 2q corrected on exact ties.
+    loan_amounts = [0] * number_of_payments
+    payments_percents = [0] * number_of_payments
+    balance = loan_amount
+    two_p, two_q = 2 * p, 2 * q
+    for month in range(number_of_payments):
+        payment_percents, remainder = divmod(balance * two_p + q, two_q)
+        if not remainder and payment_percents & 1:
+            payment_percents -= 1
+        loan_amounts[month] = balance
+        payments_percents[month] = payment_percents
+        payment_dept = payment - payment_percents
+        balance -= payment_dept if payment_dept < balance else balance
+
+    loan_amounts = np.array(loan_amounts, dtype=np.int64)
+    payments_percents = np.array(payments_percents, dtype=np.int64)
+    payments_dept = np.minimum(payment - payments_percents, loan_amounts)
+    # The last payment takes whatever is left, so the balance always ends at exactly zero.
+    payments_dept[-1:] = loan_amounts[-1:]
+    np.negative(payments_dept, out=payments_dept)
+    payments = payments_dept - payments_percents
+    remaining_payments = np.cumsum(payments[::-1])[::-1] - payments
+
+    return {
+        'loan_amount': loan_amounts,
+        'payment_percents': payments_percents,
+        'payment_dept': payments_dept,
+        'payment': payments,
+        'remaining_payment': remaining_payments,
+    }
+
+
+def calc_decimal(loan_amount: Any,
+                 interest_rate_monthly: tuple[int, int],
+                 number_of_payments: int) -> dict[str, list[Decimal]]:
+    cent = Decimal('0.01')
+    with localcontext() as context:
+        context.prec = DECIMAL_PRECISION
+        context.rounding = ROUND_HALF_EVEN
+
+        loan_amount = Decimal(str(loan_amount)).quantize(cent)
+        rate = Decimal(interest_rate_monthly[0]) / Decimal(interest_rate_monthly[1])
+
+        if not number_of_payments:
+            payment = Decimal(0)
+        elif not rate:
+            payment = (loan_amount / number_of_payments).quantize(cent)
+        else:
+            payment = (loan_amount * rate / (1 - (1 + rate) ** -number_of_payments)).quantize(cent)
+
+        loan_amounts, payments_percents, payments_dept, payments = [], [], [], []
+        balance = loan_amount
+        for month in range(number_of_payments):
+            payment_percents = (balance * rate).quantize(cent)
+            payment_dept = balance if month == number_of_payments - 1 else min(payment - payment_percents, balance)
+            loan_amounts.append(balance)
+            payments_percents.append(payment_percents)
+            payments_dept.append(-payment_dept)
+            payments.append(-payment_dept - payment_percents)
+            balance -= payment_dept
+
+        remaining_payments = []
+        remaining_payment = Decimal(0)
+        for payment in reversed(payments):
+            remaining_payments.append(remaining_payment)
+            remaining_payment += payment
+        remaining_payments.reverse()
+
+    return {
+        'loan_amount': loan_amounts,
+        'payment_percents': payments_percents,
+        'payment_dept': payments_dept,
+        'payment': payments,
+        'remaining_payment': remaining_payments,
+    }
@@ -0,0 +1,186 @@
+from __future__ import annotations
+from collections.abc import Iterable, Iterator, Mapping
+from pathlib import Path
+from typing import IO, Union
+from xml.sax.saxutils import escape
+import csv
+import math
+import zipfile
+
+import numpy as np
+
+from .calculator import PAYMENT_FIELDS_NAMES, ASchedule
+
+
+CHUNK_ROWS = 4096
+WRITE_BUFFER_SIZE = 2 ** 20
+XLSX_MAX_ROWS = 1_048_576
+LOAN_NUMBER_HEADER = '№ кредита'
+PAYMENT_NUMBER_HEADER = '#'
+
+AnySchedule = Union[ASchedule, Mapping[str, np.ndarray]]
+
+XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '{sheets}'
+    '</Types>'
+)
+XLSX_CONTENT_TYPE_SHEET = (
+    '<Override PartName="/xl/worksheets/sheet{n}.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+)
+XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets>{sheets}</sheets>'
+    '</workbook>'
+)
+XLSX_WORKBOOK_SHEET = '<sheet name="Sheet{n}" sheetId="{n}" r:id="rId{n}"/>'
+XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '{sheets}'
+    '</Relationships>'
+)
+XLSX_WORKBOOK_RELS_SHEET = (
+    '<Relationship Id="rId{n}" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet{n}.xml"/>'
+)
+XLSX_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+XLSX_SHEET_TAIL = '</sheetData></worksheet>'
+
+
+def export_schedules(path: str | Path, schedules: AnySchedule | Iterable[AnySchedule], fmt: str | None = None) -> int:
+    path = Path(path)
+    fmt = (fmt or path.suffix.lstrip('.') or 'csv').lower()
+    is_many = not isinstance(schedules, (ASchedule, Mapping))
+    if not is_many:
+        schedules = (schedules,)
+
+    header = [PAYMENT_NUMBER_HEADER, *(name for _, name in PAYMENT_FIELDS_NAMES)]
+    if is_many:
+        header.insert(0, LOAN_NUMBER_HEADER)
+    chunks = iter_chunks(schedules, is_many)
+
+    if fmt == 'csv':
+        with open(path, 'w', newline='', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as f:
+            return write_csv(f, header, chunks)
+    if fmt == 'xlsx':
+        with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=1) as f:
+            return write_xlsx(f, header, chunks)
+    raise ValueError(f"Unknown export format: {fmt}")
+
+
+def iter_chunks(schedules: Iterable[AnySchedule], is_many: bool) -> Iterator[list[np.ndarray]]:
+    for loan_number, schedule in enumerate(schedules, start=1):
+        columns = [
+            schedule[k] if isinstance(schedule, Mapping) else schedule.column(k)
+            for k, _ in PAYMENT_FIELDS_NAMES
+        ]
+        number_of_payments = len(columns[0])
+        for start in range(0, number_of_payments, CHUNK_ROWS):
+            stop = min(start + CHUNK_ROWS, number_of_payments)
+            chunk = [np.arange(start + 1, stop + 1), *(c[start:stop] for c in columns)]
+            if is_many:
+                chunk.insert(0, np.full(stop - start, loan_number))
+            yield chunk
+
+
+def row_template(number_of_columns: int, cell: str, integer_cell: str, number_of_integer_columns: int) -> str:
+    return (
+        integer_cell * number_of_integer_columns
+        + cell * (number_of_columns - number_of_integer_columns)
+    )
+
+
+def write_csv(f: IO[str], header: list[str], chunks: Iterable[list[np.ndarray]]) -> int:
+    csv.writer(f).writerow(header)
+    number_of_integer_columns = len(header) - len(PAYMENT_FIELDS_NAMES)
+    line = row_template(len(header), ',{:.2f}', ',{}', number_of_integer_columns)[1:] + '\n'
+    rows = 0
+    for chunk in chunks:
+        f.write(''.join(line.format(*row) for row in zip(*(c.tolist() for c in chunk))))
+        rows += len(chunk[0])
+    return rows
+
+
+# NaN and infinity have no XLSX number representation, so their cells are left empty.
+def xlsx_row(row: tuple, number_of_integer_columns: int) -> str:
+    return '<row>' + ''.join(
+        f'<c><v>{value}</v></c>' if n < number_of_integer_columns
+        else f'<c><v>{value:.2f}</v></c>' if math.isfinite(value)
+        else '<c/>'
+        for n, value in enumerate(row)
+    ) + '</row>'
+
+
+def write_xlsx(f: zipfile.ZipFile, header: list[str], chunks: Iterable[list[np.ndarray]]) -> int:
+    number_of_integer_columns = len(header) - len(PAYMENT_FIELDS_NAMES)
+    line = '<row>' + row_template(len(header), '<c><v>{:.2f}</v></c>', '<c><v>{}</v></c>', number_of_integer_columns) + '</row>'
+    header_line = '<row>' + ''.join(f'<c t="inlineStr"><is><t>{escape(h)}</t></is></c>' for h in header) + '</row>'
+
+    rows = 0
+    number_of_sheets = 0
+    sheet: IO[bytes] | None = None
+    sheet_rows = XLSX_MAX_ROWS
+
+    try:
+        for chunk in chunks:
+            values = list(zip(*(c.tolist() for c in chunk)))
+            is_finite = all(np.isfinite(c).all() for c in chunk)
+            while values:
+                if sheet_rows == XLSX_MAX_ROWS:
+                    if sheet is not None:
+                        sheet.write(XLSX_SHEET_TAIL.encode())
+                        sheet.close()
+                    number_of_sheets += 1
+                    sheet = f.open(f'xl/worksheets/sheet{number_of_sheets}.xml', 'w', force_zip64=True)
+                    sheet.write((XLSX_SHEET_HEAD + header_line).encode())
+                    sheet_rows = 1
+                part, values = values[:XLSX_MAX_ROWS - sheet_rows], values[XLSX_MAX_ROWS - sheet_rows:]
+                if is_finite:
+                    sheet.write(''.join(line.format(*row) for row in part).encode())
+                else:
+                    sheet.write(''.join(xlsx_row(row, number_of_integer_columns) for row in part).encode())
+                sheet_rows += len(part)
+                rows += len(part)
+
+        if sheet is None:
+            number_of_sheets = 1
+            sheet = f.open('xl/worksheets/sheet1.xml', 'w')
+            sheet.write((XLSX_SHEET_HEAD + header_line).encode())
+        sheet.write(XLSX_SHEET_TAIL.encode())
+    finally:
+        if sheet is not None:
+            sheet.close()
+
+    sheet_numbers = range(1, number_of_sheets + 1)
+    f.writestr('[Content_Types].xml', XLSX_CONTENT_TYPES.format(
+        sheets=''.join(XLSX_CONTENT_TYPE_SHEET.format(n=n) for n in sheet_numbers)
+    ))
+    f.writestr('_rels/.rels', XLSX_ROOT_RELS)
+    f.writestr('xl/workbook.xml', XLSX_WORKBOOK.format(
+        sheets=''.join(XLSX_WORKBOOK_SHEET.format(n=n) for n in sheet_numbers)
+    ))
+    f.writestr('xl/_rels/workbook.xml.rels', XLSX_WORKBOOK_RELS.format(
+        sheets=''.join(XLSX_WORKBOOK_RELS_SHEET.format(n=n) for n in sheet_numbers)
+    ))
+    return rows
@@ -1,8 +1,13 @@
 from __future__ import annotations
 from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
 from functools import partial
 from typing import Any
+import asyncio
+import copy
+import dataclasses
 import logging
+import threading
 
 from flet import (
 	Page,
@@ -11,16 +16,64 @@ from flet import (
 	Divider,
 	Switch,
 	ControlEvent,
+	Text,
+	Row,
+	TextButton,
+	FilePicker,
+	FilePickerResultEvent,
+	MainAxisAlignment,
 )
 
 import constants
 from events import Events
 
-from plugins.plugin import APlugin
+from plugins.plugin import APlugin, request_update
 
-from .calculator import Loan, NotReadyToCalculate
+from .cache import shared_schedule_cache
+from .calculator import ASchedule, Loan, NotReadyToCalculate
+from .export import export_schedules
+from .refinance import RefinanceOption, best_refinance
+from .topup import TopupLoan
 from .view import Line, LoanTable, LoanChart
-from .utils import validate_pos_int, validate_pos_float, validate_pos_percent
+from .utils import validate_pos_int, validate_pos_float, validate_pos_percent, validate_optional
+
+
+RECALCULATION_DELAY_SECONDS = 0.25
+CALCULATION_THREADS = 8
+
+_calculation_executor: ThreadPoolExecutor | None = None
+_calculation_executor_lock = threading.Lock()
+
+
+# Calculation threads are shared by all sessions of the process instead of one thread per plugin instance.
+def calculation_executor() -> ThreadPoolExecutor:
+	global _calculation_executor
+	with _calculation_executor_lock:
+		if _calculation_executor is None:
+			_calculation_executor = ThreadPoolExecutor(max_workers=CALCULATION_THREADS, thread_name_prefix='LoanPlugin')
+		return _calculation_executor
+
+
+# The inputs of one recalculation, taken together when it is scheduled.
+@dataclasses.dataclass(frozen=True)
+class LoanInputs:
+	loan_amount: float | None
+	interest_rate_yearly: float | None
+	loan_term_years: int | None
+	monthly_topup_extra: float | None
+	refinance_rate_yearly: float | None
+	refinance_fee: float | None
+
+	@classmethod
+	def of(cls, loan: TopupLoan, refinance: dict[str, float | None]) -> LoanInputs:
+		return cls(
+			loan_amount=loan.loan_amount,
+			interest_rate_yearly=loan.interest_rate_yearly,
+			loan_term_years=loan.loan_term_years,
+			monthly_topup_extra=loan.monthly_topup_extra,
+			refinance_rate_yearly=refinance['interest_rate_yearly'],
+			refinance_fee=refinance['fee'],
+		)
 
 
 class LoanPlugin(APlugin):
@@ -34,16 +87,41 @@ class LoanPlugin(APlugin):
 		self.loan_amount = None
 		self.interest_rate_yearly = None
 		self.loan_term_years = None
+		self.monthly_topup_extra = None
+		self.refinance_rate_yearly = None
+		self.refinance_fee = None
+		self.refinance = {'interest_rate_yearly': None, 'fee': None}
 
 		self.payments_table: LoanTable = LoanTable()
-		self.payments_chart: LoanChart = LoanChart()
+		self.__payments_chart: LoanChart | None = None
 		self.payments_container = Container(content=self.payments_table, expand=True, visible=False)
 		self.view_switch = Switch(label='Таблица', on_change=self.__on_switch)
+		self.summary = Text(size=12, selectable=True, visible=False)
+		self.export_button = TextButton('Экспорт', on_click=self.__on_export, disabled=True)
+		self.export_picker = FilePicker(on_result=self.__on_export_result)
+		self.stale_views: dict[str, Callable[[], None]] = {}
 
-		self.calculator = Loan()
+		# Holds the live inputs; every recalculation runs on a copy of the last calculated loan, so the schedule,
+		# the summary and the export of one result always belong to the same inputs.
+		self.calculator = TopupLoan(cache=shared_schedule_cache())
+		self.calculated_loan = TopupLoan(cache=shared_schedule_cache())
+		self.rendered_loan: TopupLoan | None = None
+		# Recalculations of this plugin must not overlap, even on the shared executor.
+		self.calculation_lock = asyncio.Lock()
+		self.recalculation_delay = RECALCULATION_DELAY_SECONDS
+		self.render_number = 0
+		self.render_task: Future | None = None
+		self.render_lock = threading.Lock()
 
 		self.container = self.build_container()
 
+	# The chart is built only when a session first switches to it.
+	@property
+	def payments_chart(self) -> LoanChart:
+		if self.__payments_chart is None:
+			self.__payments_chart = LoanChart()
+		return self.__payments_chart
+
 	def build_container(self) -> Container:
 		self.loan_amount = Line('Кредит, руб',
 								on_change=partial(self.__on_change, self.calculator.set_loan_amount),
@@ -57,6 +135,18 @@ class LoanPlugin(APlugin):
 									on_change=partial(self.__on_change, self.calculator.set_loan_term_years),
 									validator=validate_pos_int,
 									event_system=self.event_system)
+		self.monthly_topup_extra = Line('Пополнение сверх платежа, руб/мес',
+										on_change=partial(self.__on_change, self.calculator.set_monthly_topup_extra),
+										validator=validate_optional(validate_pos_float),
+										event_system=self.event_system)
+		self.refinance_rate_yearly = Line('Рефинансирование. Ставка, %год',
+										  on_change=partial(self.__on_change, self.__set_refinance_rate_yearly),
+										  validator=validate_optional(validate_pos_percent),
+										  event_system=self.event_system)
+		self.refinance_fee = Line('Рефинансирование. Комиссия, руб',
+								  on_change=partial(self.__on_change, self.__set_refinance_fee),
+								  validator=validate_optional(validate_pos_float),
+								  event_system=self.event_system)
 
 		return Container(
 			content=Column(
@@ -64,7 +154,11 @@ class LoanPlugin(APlugin):
 					self.loan_amount,
 					self.interest_rate_yearly,
 					self.loan_term_years,
-					self.view_switch,
+					self.monthly_topup_extra,
+					self.refinance_rate_yearly,
+					self.refinance_fee,
+					self.summary,
+					Row(controls=[self.view_switch, self.export_button], alignment=MainAxisAlignment.SPACE_BETWEEN),
 					Divider(),
 					self.payments_container,
 				],
@@ -74,28 +168,143 @@ class LoanPlugin(APlugin):
 			height=constants.PLUGIN_CONTAINER_HEIGHT,
 		)
 
+	# The input is set and the recalculation scheduled under one lock, so a newer input always has a newer
+	# render number than any recalculation that could still see the old one.
 	def __on_change(self, setter: Callable, value: Any):
-		try:
-			setter(value)
-			self.__render_loan()
-			self.container.update()
-		except NotReadyToCalculate as nr:
-			self.payments_container.visible = False
-			message = f"{self.__class__.__name__}.__on_change: {nr.__class__.__name__}: {nr}"
+		with self.render_lock:
+			try:
+				setter(value)
+			except Exception as e:
+				self.__on_render_error(e)
+				return
+			self.__schedule_render(LoanInputs.of(self.calculator, self.refinance))
+
+	# Every input supersedes the pending recalculation: it is cancelled while waiting for the quiet period,
+	# and its result is dropped if it is already running, so only the latest input is ever rendered.
+	def __schedule_render(self, inputs: LoanInputs):
+		self.render_number += 1
+		if self.render_task is not None:
+			self.render_task.cancel()
+		self.render_task = self.run_task(self.__render_loan_later, self.render_number, inputs)
+
+	async def __render_loan_later(self, render_number: int, inputs: LoanInputs):
+		await asyncio.sleep(self.recalculation_delay)
+		if render_number != self.render_number:
+			return
+
+		with self.batch_updates('render'):
+			try:
+				async with self.calculation_lock:
+					loan, schedules, refinance = await asyncio.get_running_loop().run_in_executor(
+						calculation_executor(), self.__calculate, inputs
+					)
+				if render_number == self.render_number:
+					self.__render_loan(loan, schedules, refinance)
+			except Exception as e:
+				if render_number == self.render_number:
+					self.__on_render_error(e)
+
+	def __on_render_error(self, error: Exception):
+		self.stale_views.clear()
+		self.payments_container.visible = False
+		self.summary.visible = False
+		self.export_button.disabled = True
+		message = f"{self.__class__.__name__}.__on_change: {error.__class__.__name__}: {error}"
+		if isinstance(error, NotReadyToCalculate):
 			logging.debug(message)
-		except Exception as e:
-			self.payments_container.visible = False
-			message = f"{self.__class__.__name__}.__on_change: {e.__class__.__name__}: {e}"
+		else:
 			logging.warning(message)
 			self.event_system.emit(Events.Main.error, message)
+		request_update(self.container)
+
+	def __set_refinance_rate_yearly(self, value: float | None) -> None:
+		self.refinance['interest_rate_yearly'] = value
+
+	def __set_refinance_fee(self, value: float | None) -> None:
+		self.refinance['fee'] = value
 
-	def __render_loan(self):
-		self.calculator.calc()
+	# The copy keeps the last schedule, so Loan can still update it incrementally, and is never changed
+	# after it is returned.
+	def __calculate(self, inputs: LoanInputs) -> tuple[TopupLoan, dict[str, ASchedule], RefinanceOption | None]:
+		loan = copy.copy(self.calculated_loan)
+		loan.loan_amount = inputs.loan_amount
+		loan.interest_rate_yearly = inputs.interest_rate_yearly
+		loan.loan_term_years = inputs.loan_term_years
+		loan.monthly_topup_extra = inputs.monthly_topup_extra
+		loan.calc()
+		self.calculated_loan = loan
+		logging.debug(f"{self.__class__.__name__}.__calculate: {loan.cache.stats()}")
 
-		self.__render_table(self.calculator)
-		self.__render_chart(self.calculator)
+		refinance = None
+		if inputs.refinance_rate_yearly is not None:
+			refinance = best_refinance(loan.schedule(), inputs.refinance_rate_yearly, inputs.refinance_fee or 0.0)
+		return loan, self.__compare_topups(loan), refinance
+
+	def __render_loan(self, loan: TopupLoan, schedules: dict[str, ASchedule], refinance: RefinanceOption | None):
+		self.rendered_loan = loan
+		self.__render_summary(loan)
+		self.__render_refinance_summary(refinance)
+		if schedules:
+			self.__render_topups_summary(schedules)
+			self.__render_views(
+				partial(self.payments_table.render_comparison, schedules),
+				lambda: self.payments_chart.render_comparison(schedules),
+			)
+		else:
+			self.__render_views(
+				partial(self.__render_table, loan),
+				partial(self.__render_chart, loan),
+			)
 		self.payments_container.visible = True
-		self.container.update()
+		self.export_button.disabled = False
+		request_update(self.container)
+
+	def __render_summary(self, loan: Loan):
+		summary = loan.summary()
+		self.summary.value = (
+			f"Ежемесячный платёж: {summary.payment:.2f} руб\n"
+			f"Всего выплат: {summary.total_payment:.2f} руб\n"
+			f"Переплата: {summary.total_interest:.2f} руб"
+		)
+		self.summary.visible = True
+
+	def __render_refinance_summary(self, option: RefinanceOption | None):
+		if option is None:
+			return
+
+		if option.month is None:
+			self.summary.value += "\nРефинансирование невыгодно"
+		else:
+			self.summary.value += (
+				f"\nРефинансирование перед платежом №{option.month + 1}: "
+				f"платёж {option.payment:.2f} руб, экономия {option.saving:.2f} руб"
+			)
+
+	def __render_topups_summary(self, schedules: dict[str, ASchedule]):
+		self.summary.value += ''.join(
+			f"\n{label}: {len(schedule)} мес, переплата {schedule.column('payment_percents').sum():.2f} руб"
+			for label, schedule in schedules.items()
+		)
+
+	@staticmethod
+	def __compare_topups(loan: TopupLoan) -> dict[str, ASchedule]:
+		if not loan.monthly_topup_extra:
+			return {}
+		return {
+			'Без пополнения': loan.schedule(),
+			**{strategy.value: schedule for strategy, schedule in loan.compare().items()},
+		}
+
+	# Only the view shown in payments_container is rendered; the other one is marked stale
+	# and rendered when the switch flips to it.
+	def __render_views(self, render_table: Callable[[], None], render_chart: Callable[[], None]):
+		self.stale_views = {'table': render_table, 'chart': render_chart}
+		self.__render_active_view()
+
+	def __render_active_view(self):
+		render = self.stale_views.pop('chart' if self.payments_container.content is self.__payments_chart else 'table', None)
+		if render is not None:
+			render()
 
 	def __render_table(self, loan: Loan):
 		self.payments_table.render(loan)
@@ -103,18 +312,36 @@ class LoanPlugin(APlugin):
 	def __render_chart(self, loan):
 		self.payments_chart.render(loan)
 
+	def __on_export(self, event: ControlEvent):
+		if self.export_picker not in self.page.overlay:
+			self.page.overlay.append(self.export_picker)
+			self.page.update()
+		self.export_picker.save_file(file_name='loan.xlsx', allowed_extensions=['xlsx', 'csv'])
+
+	def __on_export_result(self, event: FilePickerResultEvent):
+		if not event.path or self.rendered_loan is None:
+			return
+		try:
+			rows = export_schedules(event.path, self.rendered_loan.schedule())
+			logging.info(f"{self.__class__.__name__}.__on_export_result: {rows} rows -> {event.path}")
+		except Exception as e:
+			message = f"{self.__class__.__name__}.__on_export_result: {e.__class__.__name__}: {e}"
+			logging.warning(message)
+			self.event_system.emit(Events.Main.error, message)
+
 	def __on_switch(self, event: ControlEvent):
 		is_chart_view = event.control.value
 
-		if is_chart_view:
-			self.view_switch.label = 'График'
-			self.payments_container.content = self.payments_chart
-		else:
-			self.view_switch.label = 'Таблица'
-			self.payments_container.content = self.payments_table
+		with self.batch_updates('switch'):
+			if is_chart_view:
+				self.view_switch.label = 'График'
+				self.payments_container.content = self.payments_chart
+			else:
+				self.view_switch.label = 'Таблица'
+				self.payments_container.content = self.payments_table
 
-		self.view_switch.update()
-		self.payments_container.update()
+			self.__render_active_view()
+			request_update(self.view_switch, self.payments_container)
 
 
 def foo():
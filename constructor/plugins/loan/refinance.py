@@ -0,0 +1,98 @@
+from __future__ import annotations
+import dataclasses
+
+import numpy as np
+
+from .calculator import NUMBER_OF_MONTHS_IN_YEAR, Annuity, ASchedule, calc_monthly_payments
+
+
+# Savings below half a kopeck are float noise, e.g. refinancing at the same rate with no fee.
+MIN_SAVING = 0.005
+
+
+@dataclasses.dataclass(frozen=True)
+class RefinanceOption:
+    interest_rate_yearly: float
+    month: int | None
+    payment: float
+    total_cost: float
+    saving: float
+
+
+def refinance_costs(schedule: ASchedule, interest_rates_yearly, fee: float = 0.0) -> tuple[np.ndarray, np.ndarray]:
+    # Refinancing before payment m takes over the balance of row m for the payments left, so the total cost
+    # is a prefix sum of the payments made so far plus the new annuity: O(n) per rate with no schedule rebuild.
+    balances = schedule.column('loan_amount')
+    payments = -schedule.column('payment')
+    number_of_payments = len(balances)
+
+    paid_before = np.zeros(number_of_payments, dtype=np.float64)
+    np.cumsum(payments[:-1], out=paid_before[1:])
+    payments_left = number_of_payments - np.arange(number_of_payments)
+
+    interest_rates_monthly = np.asarray(interest_rates_yearly, dtype=np.float64)[..., None] / NUMBER_OF_MONTHS_IN_YEAR
+    new_payments = calc_monthly_payments(balances, interest_rates_monthly, payments_left)
+    return paid_before + fee + new_payments * payments_left, new_payments
+
+
+def best_refinance_many(schedule: ASchedule, interest_rates_yearly, fee: float = 0.0) -> list[RefinanceOption]:
+    interest_rates_yearly = np.atleast_1d(np.asarray(interest_rates_yearly, dtype=np.float64))
+    base_cost = float(-schedule.column('payment').sum())
+    if not len(schedule):
+        return [RefinanceOption(float(r), None, 0.0, base_cost, 0.0) for r in interest_rates_yearly]
+
+    costs, new_payments = refinance_costs(schedule, interest_rates_yearly, fee)
+    months = np.argmin(costs, axis=-1)
+    rows = np.arange(len(interest_rates_yearly))
+    best_costs = costs[rows, months]
+
+    return [
+        RefinanceOption(
+            interest_rate_yearly=float(rate),
+            month=int(month) if is_saving else None,
+            payment=float(payment) if is_saving else 0.0,
+            total_cost=float(cost) if is_saving else base_cost,
+            saving=float(base_cost - cost) if is_saving else 0.0,
+        )
+        for rate, month, payment, cost, is_saving in zip(
+            interest_rates_yearly, months, new_payments[rows, months], best_costs, base_cost - best_costs > MIN_SAVING
+        )
+    ]
+
+
+def best_refinance(schedule: ASchedule, interest_rate_yearly: float, fee: float = 0.0) -> RefinanceOption:
+    return best_refinance_many(schedule, [interest_rate_yearly], fee)[0]
+
+
+# The O(n^2) search that refinance_costs replaces: the full cost of refinancing before every month.
+def brute_force_refinance_costs(schedule: ASchedule, interest_rate_yearly: float, fee: float = 0.0) -> np.ndarray:
+    balances = schedule.column('loan_amount')
+    payments = -schedule.column('payment')
+    number_of_payments = len(balances)
+    interest_rate_monthly = interest_rate_yearly / NUMBER_OF_MONTHS_IN_YEAR
+    return np.array([
+        payments[:month].sum() + fee
+        + Annuity(balances[month], interest_rate_monthly, number_of_payments - month).payment * (number_of_payments - month)
+        for month in range(number_of_payments)
+    ])
+
+
+def test():
+    interest_rate_yearly = 0.367
+    schedule = Annuity.of(900_000.0, interest_rate_yearly, 5).schedule()
+    base_cost = float(-schedule.column('payment').sum())
+
+    option = best_refinance(schedule, interest_rate_yearly)
+    assert option.month is None and option.saving == 0.0, f'{option}'
+
+    for rate, fee in ((0.2, 0.0), (0.2, 50_000.0), (0.3, 20_000.0), (0.35, 500_000.0), (0.5, 0.0)):
+        costs = brute_force_refinance_costs(schedule, rate, fee)
+        assert np.allclose(refinance_costs(schedule, [rate], fee)[0][0], costs, rtol=0.0, atol=0.01), f'{rate}, {fee}'
+
+        option = best_refinance(schedule, rate, fee)
+        month = int(np.argmin(costs))
+        if base_cost - costs[month] > MIN_SAVING:
+            assert option.month == month, f'{rate}, {fee}: {option} != month {month}'
+            assert abs(option.total_cost - costs[month]) < 0.01, f'{rate}, {fee}: {option} != cost {costs[month]}'
+        else:
+            assert option.month is None and option.total_cost == base_cost, f'{rate}, {fee}: {option}'
@@ -0,0 +1,172 @@
+from __future__ import annotations
+import dataclasses
+import enum
+
+import numpy as np
+
+from .cache import ScheduleCache
+from .calculator import NUMBER_OF_MONTHS_IN_YEAR, PAYMENT_FIELDS_NAMES, Annuity, Loan, NotReadyToCalculate, Schedule
+
+
+PAID_OFF_BALANCE = 0.005
+DEFAULT_NUMBER_OF_CANDIDATES = 4096
+
+
+class TopupStrategy(enum.Enum):
+    SHORTEN_TERM = 'Сокращение срока'
+    LOWER_PAYMENT = 'Уменьшение платежа'
+
+
+@dataclasses.dataclass(frozen=True)
+class TopupOutcome:
+    monthly_topups_extra: np.ndarray
+    numbers_of_payments: np.ndarray
+    total_interest: np.ndarray
+    total_payment: np.ndarray
+
+
+def simulate(loan_amount: float,
+             interest_rate_yearly: float,
+             loan_term_years: int,
+             monthly_topup_extra: float,
+             strategy: TopupStrategy) -> Schedule:
+    assert monthly_topup_extra >= 0.0, f"Top-up must not be negative, got: {monthly_topup_extra}"
+    interest_rate_monthly = interest_rate_yearly / NUMBER_OF_MONTHS_IN_YEAR
+    number_of_payments = loan_term_years * NUMBER_OF_MONTHS_IN_YEAR
+    payment = Annuity(loan_amount, interest_rate_monthly, number_of_payments).payment
+
+    balance = loan_amount
+    loan_amounts, payments_percents, payments_dept = [], [], []
+
+    for month in range(number_of_payments):
+        if balance <= PAID_OFF_BALANCE:
+            break
+        if strategy is TopupStrategy.LOWER_PAYMENT and month:
+            payment = Annuity(balance, interest_rate_monthly, number_of_payments - month).payment
+
+        payment_percents = balance * interest_rate_monthly
+        payment_dept = min(balance, payment - payment_percents + monthly_topup_extra)
+        loan_amounts.append(balance)
+        payments_percents.append(payment_percents)
+        payments_dept.append(-payment_dept)
+        balance -= payment_dept
+
+    payments_dept = np.array(payments_dept, dtype=np.float64)
+    payments = payments_dept - np.array(payments_percents, dtype=np.float64)
+    remaining_payments = np.cumsum(payments[::-1])[::-1] - payments
+
+    return Schedule({
+        'loan_amount': loan_amounts,
+        'payment_percents': payments_percents,
+        'payment_dept': payments_dept,
+        'payment': payments,
+        'remaining_payment': remaining_payments,
+    })
+
+
+def simulate_many(loan_amount: float,
+                  interest_rate_yearly: float,
+                  loan_term_years: int,
+                  monthly_topups_extra,
+                  strategy: TopupStrategy) -> TopupOutcome:
+    monthly_topups_extra = np.asarray(monthly_topups_extra, dtype=np.float64)
+    assert (monthly_topups_extra >= 0.0).all(), "Top-ups must not be negative"
+    interest_rate_monthly = interest_rate_yearly / NUMBER_OF_MONTHS_IN_YEAR
+    number_of_payments = loan_term_years * NUMBER_OF_MONTHS_IN_YEAR
+    log_growth = np.log1p(interest_rate_monthly)
+
+    balance = np.full(monthly_topups_extra.shape, loan_amount, dtype=np.float64)
+    payment = np.full(monthly_topups_extra.shape, Annuity(loan_amount, interest_rate_monthly, number_of_payments).payment)
+    numbers_of_payments = np.zeros(monthly_topups_extra.shape, dtype=np.int64)
+    total_interest = np.zeros(monthly_topups_extra.shape, dtype=np.float64)
+
+    # One step per month for all top-ups at once; paid off loans keep a zero balance and stop counting.
+    for month in range(number_of_payments):
+        is_active = balance > PAID_OFF_BALANCE
+        if not is_active.any():
+            break
+        if strategy is TopupStrategy.LOWER_PAYMENT and month:
+            payments_left = number_of_payments - month
+            if interest_rate_monthly == 0.0:
+                payment = balance / payments_left
+            else:
+                payment = balance * interest_rate_monthly * (1.0 + 1.0 / np.expm1(payments_left * log_growth))
+
+        payment_percents = balance * interest_rate_monthly
+        payment_dept = np.minimum(balance, payment - payment_percents + monthly_topups_extra)
+        balance -= np.where(is_active, payment_dept, 0.0)
+        total_interest += np.where(is_active, payment_percents, 0.0)
+        numbers_of_payments += is_active
+
+    return TopupOutcome(
+        monthly_topups_extra=monthly_topups_extra,
+        numbers_of_payments=numbers_of_payments,
+        total_interest=total_interest,
+        total_payment=total_interest + loan_amount,
+    )
+
+
+def break_even_topup(loan_amount: float,
+                     interest_rate_yearly: float,
+                     loan_term_years: int,
+                     interest_saving: float,
+                     strategy: TopupStrategy,
+                     monthly_topups_extra=None) -> float | None:
+    if monthly_topups_extra is None:
+        monthly_topups_extra = np.linspace(0.0, loan_amount, DEFAULT_NUMBER_OF_CANDIDATES)
+    monthly_topups_extra = np.sort(np.asarray(monthly_topups_extra, dtype=np.float64))
+
+    base_interest = Annuity.of(loan_amount, interest_rate_yearly, loan_term_years).summary().total_interest
+    outcome = simulate_many(loan_amount, interest_rate_yearly, loan_term_years, monthly_topups_extra, strategy)
+    # The saving only grows with the top-up, so the smallest sufficient top-up is a binary search away.
+    savings = np.maximum.accumulate(base_interest - outcome.total_interest)
+    n = int(np.searchsorted(savings, interest_saving))
+    return float(monthly_topups_extra[n]) if n < len(monthly_topups_extra) else None
+
+
+class TopupLoan(Loan):
+    def __init__(self, cache: ScheduleCache | None = None, lazy: bool = False) -> None:
+        super().__init__(cache=cache, lazy=lazy)
+        self.monthly_topup_extra = 0.0
+
+    def set_monthly_topup_extra(self, value: float) -> None:
+        self.monthly_topup_extra = value
+
+    def simulate(self, strategy: TopupStrategy) -> Schedule:
+        if not self.is_ready():
+            raise NotReadyToCalculate(f"Not ready to calculate: {self}")
+        return simulate(
+            self.loan_amount,
+            self.interest_rate_yearly,
+            self.loan_term_years,
+            self.monthly_topup_extra,
+            strategy,
+        )
+
+    def compare(self) -> dict[TopupStrategy, Schedule]:
+        return {strategy: self.simulate(strategy) for strategy in TopupStrategy}
+
+
+def test():
+    loan_amount, interest_rate_yearly, loan_term_years = 900_000.0, 0.367, 5
+    base = Annuity.of(loan_amount, interest_rate_yearly, loan_term_years).schedule()
+    monthly_topups_extra = [0.0, 10_000.0, 60_000.0, loan_amount]
+
+    for strategy in TopupStrategy:
+        schedule = simulate(loan_amount, interest_rate_yearly, loan_term_years, 0.0, strategy)
+        assert len(schedule) == len(base), f'{strategy}: {len(schedule)} != {len(base)}'
+        for k, _ in PAYMENT_FIELDS_NAMES:
+            assert np.allclose(schedule.column(k), base.column(k), rtol=0.0, atol=0.01), f'{strategy}: {k}'
+
+        outcome = simulate_many(loan_amount, interest_rate_yearly, loan_term_years, monthly_topups_extra, strategy)
+        for n, monthly_topup_extra in enumerate(monthly_topups_extra):
+            schedule = simulate(loan_amount, interest_rate_yearly, loan_term_years, monthly_topup_extra, strategy)
+            principal = -schedule.column('payment_dept').sum()
+            assert abs(principal - loan_amount) < 0.01, f'{strategy}, {monthly_topup_extra}: {principal}'
+            assert outcome.numbers_of_payments[n] == len(schedule), (
+                f'{strategy}, {monthly_topup_extra}: {outcome.numbers_of_payments[n]} != {len(schedule)}'
+            )
+            interest = schedule.column('payment_percents').sum()
+            assert abs(outcome.total_interest[n] - interest) < 0.01, (
+                f'{strategy}, {monthly_topup_extra}: {outcome.total_interest[n]} != {interest}'
+            )
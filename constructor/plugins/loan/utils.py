@@ -1,13 +1,18 @@
+from collections.abc import Callable
 from typing import Any
+import functools
+import math
 import textwrap
 from .calculator import PAYMENT_FIELDS_NAMES
 
 
 def validate_numeric(value: Any) -> float:
     try:
-        return float(value)
+        value = float(value)
     except ValueError:
         assert False, f"Ожидается числовое значение, получено: {value}"
+    assert math.isfinite(value), f"Ожидается конечное числовое значение, получено: {value}"
+    return value
 
 
 def validate_positive(value: Any) -> float:
@@ -34,6 +39,12 @@ def validate_pos_float(value: Any):
 def validate_pos_percent(value: Any) -> float:
     return validate_pos_float(value) / 100.0
 
+
+def validate_optional(validator: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    def validate(value: Any) -> Any:
+        return None if not str(value).strip() else validator(value)
+    return validate
+
 def render_header(columns, column_width: int, column_padding=2) -> str:
     columns = [textwrap.wrap(c, width=column_width) for c in columns]
     max_lines = max(len(c) for c in columns)
@@ -51,6 +62,18 @@ def render_header(columns, column_width: int, column_padding=2) -> str:
     return "\n".join(result)
 
 
+@functools.cache
+def fixed_width_template(number_of_columns: int, column_width: int, column_padding=2) -> str:
+    return f'{{:<{column_width + column_padding}}}' * number_of_columns
+
+
+def render_row(columns, column_width: int, column_padding=2) -> str:
+    # Cells that fit in a single line are laid out by a precomputed template; only longer cells need wrapping.
+    if all(len(c) <= column_width for c in columns):
+        return fixed_width_template(len(columns), column_width, column_padding).format(*columns)
+    return render_header(columns, column_width, column_padding)
+
+
 def payment_field_name_by(field_id: str) -> str:
     for id_, name in PAYMENT_FIELDS_NAMES:
         if field_id == id_:
@@ -0,0 +1,59 @@
+import math
+
+import numpy as np
+
+
+NICE_STEPS = (1, 2, 2.5, 5, 10)
+
+
+# Largest-Triangle-Three-Buckets: indices of at most `budget` points of y(x = index) that keep the curve shape.
+def lttb(y: np.ndarray, budget: int) -> np.ndarray:
+    n = len(y)
+    if budget >= n or n <= 2:
+        return np.arange(n)
+    if budget < 3:
+        return np.array([0, n - 1])[:budget]
+
+    y = np.asarray(y, dtype=np.float64)
+    # The first and last points are always kept; the rest is split into budget - 2 buckets.
+    edges = np.linspace(1, n - 1, budget - 1).astype(np.intp)
+    indices = np.empty(budget, dtype=np.intp)
+    indices[0], indices[-1] = 0, n - 1
+
+    previous = 0
+    for bucket in range(budget - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        if bucket + 2 < len(edges):
+            next_x = (edges[bucket + 1] + edges[bucket + 2] - 1) / 2
+            next_y = y[edges[bucket + 1]:edges[bucket + 2]].mean()
+        else:
+            next_x, next_y = n - 1, y[-1]
+
+        x = np.arange(start, stop)
+        areas = np.abs((previous - next_x) * (y[start:stop] - y[previous]) - (previous - x) * (next_y - y[previous]))
+        previous = indices[bucket + 1] = start + int(areas.argmax())
+
+    return indices
+
+
+def nice_step(span: float, max_ticks: int) -> float:
+    if span <= 0:
+        return 1.0
+    raw_step = span / max_ticks
+    magnitude = 10 ** math.floor(math.log10(raw_step))
+    for step in NICE_STEPS:
+        if step * magnitude >= raw_step:
+            return step * magnitude
+    return 10 * magnitude
+
+
+def nice_ticks(max_value: float, max_ticks: int, min_step: float = 0) -> list[float]:
+    step = max(nice_step(max_value, max_ticks), min_step)
+    return [n * step for n in range(int(max_value // step) + 1)]
+
+
+def compact_number(value: float) -> str:
+    for divider, suffix in ((10 ** 9, 'B'), (10 ** 6, 'M'), (10 ** 3, 'k')):
+        if abs(value) >= divider:
+            return f'{value / divider:g}{suffix}'
+    return f'{value:g}'
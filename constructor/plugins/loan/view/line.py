@@ -12,6 +12,7 @@ from flet import (
 )
 
 from events import Events
+from plugins.plugin import batch_updates, request_update
 
 if TYPE_CHECKING:
     from event_system import EventSystem
@@ -34,21 +35,22 @@ class Line(Row):
         super().__init__(controls=[self.name_field, self.value_field], alignment=MainAxisAlignment.SPACE_BETWEEN, *args, **kwargs)
 
     def __on_change(self, event):
-        try:
-            value = self.validator(event.data)
-            self.value_field.border_color = Colors.BLACK
-            self.on_change(value)
-        except AssertionError as ae:
-            self.value_field.border_color = Colors.RED
-            logging.warning(f"{self.__class__.__name__}.__on_change: {ae.__class__.__name__}: {ae}")
-            if self.event_system:
-                self.event_system.emit(Events.Main.error, f"{self._name}: {ae}")
-        except Exception as e:
-            self.value_field.border_color = Colors.RED
-            logging.error(f"{self.__class__.__name__}.__on_change: {e.__class__.__name__}: {e}")
-
-        self.update()
+        with batch_updates(self.page, f"{self.__class__.__name__}({self._name})"):
+            try:
+                value = self.validator(event.data)
+                self.value_field.border_color = Colors.BLACK
+                self.on_change(value)
+            except AssertionError as ae:
+                self.value_field.border_color = Colors.RED
+                logging.warning(f"{self.__class__.__name__}.__on_change: {ae.__class__.__name__}: {ae}")
+                if self.event_system:
+                    self.event_system.emit(Events.Main.error, f"{self._name}: {ae}")
+            except Exception as e:
+                self.value_field.border_color = Colors.RED
+                logging.error(f"{self.__class__.__name__}.__on_change: {e.__class__.__name__}: {e}")
+
+            request_update(self)
 
     def set_value(self, value: float) -> None:
         self.value_field.value = value
-        self.update()
+        request_update(self)
@@ -1,4 +1,5 @@
 from __future__ import annotations
+from collections.abc import Mapping
 from typing import Any, TYPE_CHECKING
 
 from flet import (
@@ -17,20 +18,27 @@ from flet import (
     TextSpan,
     TextStyle,
 )
+import numpy as np
 
 from ..utils import payment_field_name_by
+from .decimation import compact_number, lttb, nice_ticks
 
 if TYPE_CHECKING:
-    from ..calculator import Loan
+    from ..calculator import ASchedule, Loan
 
 
 TABLE_COLUMN_WIDTH = 11
 TABLE_FONT = "Courier New"
+COMPARISON_COLORS = (Colors.BLUE_GREY, Colors.LIGHT_GREEN, Colors.PINK, Colors.AMBER)
+POINT_BUDGET = 120
+MAX_LEFT_TICKS = 8
+MAX_BOTTOM_TICKS = 12
 
 
 class LoanChart(LineChart):
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, point_budget: int = POINT_BUDGET, **kwargs):
         super().__init__(*args, **kwargs)
+        self.point_budget = point_budget
         self.border = Border(
             bottom=BorderSide(4, Colors.with_opacity(0.5, Colors.ON_SURFACE))
         )
@@ -39,45 +47,15 @@ class LoanChart(LineChart):
         self.min_x = 0
 
     def render(self, loan: Loan) -> None:
-        points_percents = []
-        points_debt = []
-        max_payment = 0.0
         number_of_payments = loan.number_of_payments()
         tooltip_style = TextStyle(size=10)
 
-        for n in range(loan.number_of_payments()):
-            payment = loan.get_payment(n)
-            max_payment = max(max_payment, payment.payment_percents, abs(payment.payment_dept))
+        payments_percents = loan.column('payment_percents')
+        payments_debt = np.abs(loan.column('payment_dept'))
+        max_payment = float(max(payments_percents.max(initial=0.0), payments_debt.max(initial=0.0)))
 
-            percents_y = round(payment.payment_percents, 2)
-            tooltip_percents = "{} : {} : {}".format(
-                n,
-                payment_field_name_by('payment_percents'),
-                percents_y,
-            )
-            points_percents.append(
-                LineChartDataPoint(
-                    x=n,
-                    y=percents_y,
-                    tooltip=tooltip_percents,
-                    tooltip_style=tooltip_style,
-                )
-            )
-
-            debt_y = round(abs(payment.payment_dept), 2)
-            tooltip_debt = "{} : {} : {}".format(
-                n,
-                payment_field_name_by('payment_dept'),
-                debt_y,
-            )
-            points_debt.append(
-                LineChartDataPoint(
-                    x=n,
-                    y=debt_y,
-                    tooltip=tooltip_debt,
-                    tooltip_style=tooltip_style,
-                )
-            )
+        points_percents = self.__points(payments_percents, payment_field_name_by('payment_percents'), tooltip_style)
+        points_debt = self.__points(payments_debt, payment_field_name_by('payment_dept'), tooltip_style)
 
         self.data_series = [
             LineChartData(
@@ -95,26 +73,60 @@ class LoanChart(LineChart):
                 stroke_cap_round=True,
             ),
         ]
-        self.__render_left_axis(max_payment)
+        self.__render_left_axis(max_payment, [
+            TextSpan(payment_field_name_by('payment_percents'), TextStyle(color=Colors.LIGHT_GREEN)),
+            TextSpan('\n'),
+            TextSpan(payment_field_name_by('payment_dept'), TextStyle(color=Colors.PINK)),
+        ])
         self.__render_bottom_axis(number_of_payments)
         self.animate=1000
 
-    def __render_left_axis(self, max_payment: float):
-        step = 1000
+    def render_comparison(self, schedules: Mapping[str, ASchedule]) -> None:
+        tooltip_style = TextStyle(size=10)
+        number_of_payments = max((len(s) for s in schedules.values()), default=0)
+        max_loan_amount = float(max((s.column('loan_amount').max(initial=0.0) for s in schedules.values()), default=0.0))
+
+        self.data_series = [
+            LineChartData(
+                self.__points(schedule.column('loan_amount'), label, tooltip_style),
+                stroke_width=4,
+                color=color,
+                curved=True,
+                stroke_cap_round=True,
+            )
+            for (label, schedule), color in zip(schedules.items(), COMPARISON_COLORS)
+        ]
+        self.__render_left_axis(max_loan_amount, [
+            TextSpan(f'{label}\n', TextStyle(color=color))
+            for label, color in zip(schedules, COMPARISON_COLORS)
+        ])
+        self.__render_bottom_axis(number_of_payments)
+        self.animate=1000
+
+    # Decimation keeps the point count within the budget whatever the term; the month stays the x value.
+    def __points(self, values: np.ndarray, label: str, tooltip_style: TextStyle) -> list[LineChartDataPoint]:
+        indices = lttb(values, self.point_budget)
+        return [
+            LineChartDataPoint(
+                x=n,
+                y=y,
+                tooltip="{} : {} : {}".format(n, label, y),
+                tooltip_style=tooltip_style,
+            )
+            for n, y in zip(indices.tolist(), np.round(values[indices], 2).tolist())
+        ]
+
+    def __render_left_axis(self, max_payment: float, title: list[TextSpan]):
         self.left_axis = ChartAxis(
             labels=[
                 ChartAxisLabel(
-                    value=x * step,
-                    label=Text(f"{x}k", size=14, weight=FontWeight.BOLD),
+                    value=y,
+                    label=Text(compact_number(y), size=14, weight=FontWeight.BOLD),
                 )
-                for x in range(int(max_payment // step) + 1)
+                for y in nice_ticks(max_payment, MAX_LEFT_TICKS)
             ],
             labels_size=40,
-            title=Text(spans=[
-                TextSpan(payment_field_name_by('payment_percents'), TextStyle(color=Colors.LIGHT_GREEN)),
-                TextSpan('\n'),
-                TextSpan(payment_field_name_by('payment_dept'), TextStyle(color=Colors.PINK)),
-            ]),
+            title=Text(spans=title),
             title_size=40,
         )
         self.min_y = 0
@@ -128,7 +140,7 @@ class LoanChart(LineChart):
                     value=n,
                     label=Container(
                         Text(
-                            f"{n}",
+                            f"{n:g}",
                             size=16,
                             weight=FontWeight.BOLD,
                             color=Colors.with_opacity(0.5, Colors.ON_SURFACE),
@@ -136,7 +148,7 @@ class LoanChart(LineChart):
                         margin=margin.only(top=10),
                     ),
                 )
-                for n in range(number_of_payments + 1)
+                for n in nice_ticks(number_of_payments, MAX_BOTTOM_TICKS, min_step=1)
             ],
             labels_size=32,
             show_labels=True,
@@ -1,47 +1,133 @@
 from __future__ import annotations
+from collections.abc import Callable, Mapping
 from itertools import chain
+import math
 from typing import Any, TYPE_CHECKING
 
 from flet import (
     Column,
+    Container,
     Text,
     ListView,
     Divider,
+    OnScrollEvent,
 )
 
 from ..calculator import PAYMENT_FIELDS_NAMES
-from ..utils import render_header
+from ..utils import render_header, render_row, payment_field_name_by
 
 if TYPE_CHECKING:
-    from ..calculator import Loan
+    from ..calculator import ASchedule, Loan
 
 
 TABLE_COLUMN_WIDTH = 11
 TABLE_FONT = "Courier New"
+TABLE_ROW_HEIGHT = 20
+WINDOW_ROWS = 30
+OVERSCAN_ROWS = 10
+SCROLL_INTERVAL_MS = 50
 
 
 class LoanTable(Column):
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, virtualized: bool = True, **kwargs):
         super().__init__(*args, **kwargs)
+        self.virtualized = virtualized
         self.table_header: ListView | None = None
         self.table: ListView | None = None
+        self.rows: Column | None = None
+        self.top_spacer: Container | None = None
+        self.bottom_spacer: Container | None = None
+        self.__format_row: Callable[[int], str] = str
+        self.__number_of_rows = 0
+        self.__row_height = TABLE_ROW_HEIGHT
+        self.__window_rows = WINDOW_ROWS
+        self.__scroll_pixels = 0.0
+        self.__first_row = 0
+        self.__last_row = 0
         self.build_table()
 
     def render(self, loan: Loan) -> None:
-        self.table.controls.clear()
-        rows = []
+        schedule = loan.schedule()
 
-        for n in range(loan.number_of_payments()):
-            payment = loan.get_payment(n)
-            rows.append(
-                Text(
-                    render_header([f'{x:.2f}' for x in chain([n + 1], payment)], TABLE_COLUMN_WIDTH),
-                    font_family=TABLE_FONT,
-                    selectable=True,
-                )
-            )
+        def format_row(n: int) -> str:
+            return render_row([f'{x:.2f}' for x in chain([n + 1], schedule[n])], TABLE_COLUMN_WIDTH)
+
+        self.__show_rows(format_row, len(schedule))
+        self.__render_header([n for _, n in chain([(None, '#')], PAYMENT_FIELDS_NAMES)])
+
+    def render_comparison(self, schedules: Mapping[str, ASchedule]) -> None:
+        schedules = dict(schedules)
+
+        def format_row(n: int) -> str:
+            cells = [f'{n + 1}']
+            for schedule in schedules.values():
+                if n < len(schedule):
+                    payment = schedule[n]
+                    cells.extend((f'{payment.payment:.2f}', f'{payment.loan_amount:.2f}'))
+                else:
+                    cells.extend(('', ''))
+            return render_row(cells, TABLE_COLUMN_WIDTH)
+
+        self.__show_rows(format_row, max((len(s) for s in schedules.values()), default=0))
+        self.__render_header(['#', *chain.from_iterable(
+            (f'{label}: {payment_field_name_by("payment")}', f'{label}: {payment_field_name_by("loan_amount")}')
+            for label in schedules
+        )])
+
+    def __show_rows(self, format_row: Callable[[int], str], number_of_rows: int) -> None:
+        self.__format_row = format_row
+        self.__number_of_rows = number_of_rows
+        # The first row holds the largest amounts, so it wraps into the most lines.
+        lines = format_row(0).count('\n') + 1 if number_of_rows else 1
+        self.__row_height = TABLE_ROW_HEIGHT * lines
+        self.__fill_rows(self.__first_visible_row())
+
+    def __first_visible_row(self) -> int:
+        return min(int(self.__scroll_pixels // self.__row_height), max(0, self.__number_of_rows - self.__window_rows))
+
+    # Only the visible window plus overscan on both sides is built; spacers stand in for the rest of the rows,
+    # so the cost of a render and the payload sent to the client do not depend on the loan term.
+    def __fill_rows(self, first_visible_row: int) -> None:
+        if self.virtualized:
+            first_row = max(0, first_visible_row - OVERSCAN_ROWS)
+            last_row = min(self.__number_of_rows, first_visible_row + self.__window_rows + OVERSCAN_ROWS)
+        else:
+            first_row, last_row = 0, self.__number_of_rows
+
+        self.__first_row, self.__last_row = first_row, last_row
+        self.top_spacer.height = first_row * self.__row_height
+        self.bottom_spacer.height = (self.__number_of_rows - last_row) * self.__row_height
+
+        # Row controls are pooled: only changed properties are sent to the client on the next update,
+        # and controls are added or removed only when the number of rows in the window changes.
+        pool = self.rows.controls
+        number_of_rows = last_row - first_row
+        del pool[number_of_rows:]
+        while len(pool) < number_of_rows:
+            pool.append(Text(font_family=TABLE_FONT, selectable=True))
+
+        for row, n in zip(pool, range(first_row, last_row)):
+            value = self.__format_row(n)
+            if row.value != value:
+                row.value = value
+            if row.height != self.__row_height:
+                row.height = self.__row_height
+
+    def __on_scroll(self, event: OnScrollEvent) -> None:
+        if event.viewport_dimension:
+            self.__window_rows = math.ceil(event.viewport_dimension / self.__row_height)
+        if event.pixels is None:
+            return
+
+        self.__scroll_pixels = event.pixels
+        first_visible_row = self.__first_visible_row()
+        last_visible_row = min(self.__number_of_rows, first_visible_row + self.__window_rows)
+        if first_visible_row < self.__first_row or last_visible_row > self.__last_row:
+            self.__fill_rows(first_visible_row)
+            self.table.update()
 
-        self.table.controls.extend(rows)
+    def __render_header(self, columns: list[str]) -> None:
+        self.table_header.controls[0].value = render_header(columns, TABLE_COLUMN_WIDTH)
 
     def build_table(self) -> None:
         self.table_header = ListView(
@@ -52,8 +138,15 @@ class LoanTable(Column):
                 ),
             ],
         )
+        self.top_spacer = Container(height=0)
+        self.rows = Column(spacing=0)
+        self.bottom_spacer = Container(height=0)
         self.table = ListView(
+            controls=[self.top_spacer, self.rows, self.bottom_spacer],
+            spacing=0,
             expand=True,
+            on_scroll_interval=SCROLL_INTERVAL_MS if self.virtualized else None,
+            on_scroll=self.__on_scroll if self.virtualized else None,
         )
         self.controls=[
             self.table_header,
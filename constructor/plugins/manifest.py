@@ -0,0 +1,112 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import TYPE_CHECKING
+import ast
+import dataclasses
+import importlib
+import json
+import logging
+
+if TYPE_CHECKING:
+	from .plugin import APlugin
+
+
+PLUGINS_DIR = Path(__file__).parent
+MANIFEST_PATH = PLUGINS_DIR / '__pycache__' / 'manifest.json'
+PLUGIN_BASE_CLASS = 'APlugin'
+
+
+@dataclasses.dataclass(frozen=True)
+class PluginSpec:
+	module: str
+	class_name: str
+	name: str
+	order: int | float = float('inf')
+
+	def load(self) -> type[APlugin]:
+		return getattr(importlib.import_module(self.module), self.class_name)
+
+
+def plugin_sources(plugins_dir: Path = PLUGINS_DIR) -> dict[str, int]:
+	return {
+		path.relative_to(plugins_dir).as_posix(): path.stat().st_mtime_ns
+		for package in sorted(plugins_dir.iterdir())
+		if package.is_dir() and not package.name.startswith('_')
+		for path in sorted(package.glob('*.py'))
+	}
+
+
+def base_names(node: ast.ClassDef) -> list[str]:
+	return [
+		base.id if isinstance(base, ast.Name) else base.attr
+		for base in node.bases
+		if isinstance(base, (ast.Name, ast.Attribute))
+	]
+
+
+# A class is a plugin if it derives from APlugin directly or through other classes defined in the scanned sources.
+def is_plugin_class(name: str, bases: dict[str, list[str]], seen: frozenset[str] = frozenset()) -> bool:
+	return any(
+		base == PLUGIN_BASE_CLASS
+		or base in bases and base not in seen and is_plugin_class(base, bases, seen | {name})
+		for base in bases.get(name, ())
+	)
+
+
+def class_constants(node: ast.ClassDef) -> dict[str, object]:
+	constants = {}
+	for statement in node.body:
+		if isinstance(statement, ast.Assign) and len(statement.targets) == 1 and isinstance(statement.targets[0], ast.Name):
+			try:
+				constants[statement.targets[0].id] = ast.literal_eval(statement.value)
+			except ValueError:
+				pass
+	return constants
+
+
+# Plugins are found by parsing the sources, so nothing is imported until a plugin is actually used.
+def scan(sources: dict[str, int], plugins_dir: Path = PLUGINS_DIR) -> list[PluginSpec]:
+	classes = []
+	for source in sources:
+		tree = ast.parse((plugins_dir / source).read_bytes(), filename=source)
+		module = '.'.join((plugins_dir.name, *Path(source).with_suffix('').parts))
+		classes.extend((module, node) for node in tree.body if isinstance(node, ast.ClassDef))
+
+	bases = {}
+	for _, node in classes:
+		bases.setdefault(node.name, []).extend(base_names(node))
+
+	specs = []
+	for module, node in classes:
+		if is_plugin_class(node.name, bases):
+			constants = class_constants(node)
+			specs.append(PluginSpec(
+				module=module,
+				class_name=node.name,
+				name=str(constants.get('name', node.name)),
+				order=constants.get('order', float('inf')),
+			))
+	return sorted(specs, key=lambda spec: (spec.order, spec.module))
+
+
+# The manifest is rebuilt only when a plugin source is added, removed or modified.
+def discover_plugins(plugins_dir: Path = PLUGINS_DIR, manifest_path: Path = MANIFEST_PATH) -> list[PluginSpec]:
+	sources = plugin_sources(plugins_dir)
+
+	try:
+		manifest = json.loads(manifest_path.read_text(encoding='utf-8'))
+		if manifest['sources'] == sources:
+			return [PluginSpec(**spec) for spec in manifest['plugins']]
+	except (OSError, ValueError, KeyError, TypeError):
+		pass
+
+	specs = scan(sources, plugins_dir)
+	try:
+		manifest_path.parent.mkdir(exist_ok=True)
+		manifest_path.write_text(
+			json.dumps({'sources': sources, 'plugins': [dataclasses.asdict(spec) for spec in specs]}, indent=1),
+			encoding='utf-8',
+		)
+	except OSError as e:
+		logging.debug(f'discover_plugins: manifest is not cached: {e.__class__.__name__}: {e}')
+	return specs
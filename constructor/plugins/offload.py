@@ -0,0 +1,185 @@
+from __future__ import annotations
+from collections.abc import Callable
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor
+from typing import Any
+import dataclasses
+import itertools
+import logging
+import os
+import threading
+import time
+
+
+WORKERS = min(os.cpu_count() or 1, 4)
+MAX_PENDING = 64
+
+
+class OffloadQueueFull(Exception):
+	pass
+
+
+@dataclasses.dataclass(frozen=True)
+class OffloadStats:
+	workers: int
+	pending: int
+	submitted: int
+	completed: int
+	failed: int
+	cancelled: int
+	timed_out: int
+	rejected: int
+	peak_pending: int
+
+
+class OffloadJob:
+	def __init__(self, job_id: int, future: Future, timeout: float | None):
+		self.id = job_id
+		self.future = future
+		self.timeout = timeout
+		self.submitted = time.perf_counter()
+		self.finished: float | None = None
+		self.timed_out = False
+
+	@property
+	def seconds(self) -> float | None:
+		return None if self.finished is None else self.finished - self.submitted
+
+	def done(self) -> bool:
+		return self.timed_out or self.future.done()
+
+	def cancelled(self) -> bool:
+		return self.future.cancelled()
+
+	def cancel(self) -> bool:
+		return self.future.cancel()
+
+	# Called once the job is delivered, so it never blocks: a late result of a timed out job is not returned.
+	def result(self) -> Any:
+		if self.timed_out:
+			raise TimeoutError(f"Offload job {self.id} did not finish in {self.timeout} s")
+		return self.future.result(timeout=0)
+
+	def __repr__(self):
+		return f"{self.__class__.__name__}(id={self.id}, done={self.done()}, timed_out={self.timed_out})"
+
+
+# One size-limited process pool shared by every plugin. A job that is still queued can be cancelled;
+# a running one cannot be interrupted, so a timeout delivers TimeoutError and drops the late result.
+# The timeout counts from submission, so time spent waiting for a free worker is included.
+class Offload:
+	def __init__(self, max_workers: int = WORKERS, max_pending: int = MAX_PENDING):
+		assert max_workers > 0, f"Number of workers must be positive, got: {max_workers}"
+		assert max_pending > 0, f"Queue size must be positive, got: {max_pending}"
+		self.max_workers = max_workers
+		self.max_pending = max_pending
+		self.__executor: ProcessPoolExecutor | None = None
+		self.__lock = threading.Lock()
+		self.__ids = itertools.count(1)
+		self.__pending: dict[int, OffloadJob] = {}
+		self.__reserved = 0
+		self.__counters = dict.fromkeys(
+			('submitted', 'completed', 'failed', 'cancelled', 'timed_out', 'rejected', 'peak_pending'), 0
+		)
+
+	def executor(self) -> ProcessPoolExecutor:
+		with self.__lock:
+			if self.__executor is None:
+				self.__executor = ProcessPoolExecutor(max_workers=self.max_workers)
+			return self.__executor
+
+	def submit(self,
+			   fn: Callable,
+			   *args,
+			   deliver: Callable[[OffloadJob], None] | None = None,
+			   timeout: float | None = None) -> OffloadJob:
+		# The slot is reserved together with the check, so concurrent submits cannot overrun the limit.
+		with self.__lock:
+			pending = len(self.__pending) + self.__reserved
+			if pending >= self.max_pending:
+				self.__counters['rejected'] += 1
+				raise OffloadQueueFull(f"{pending} jobs pending, limit is {self.max_pending}")
+			self.__reserved += 1
+
+		try:
+			future = self.executor().submit(fn, *args)
+		except BaseException:
+			with self.__lock:
+				self.__reserved -= 1
+			raise
+
+		job = OffloadJob(next(self.__ids), future, timeout)
+		delivered = threading.Event()
+
+		def finish(timed_out: bool = False) -> None:
+			with self.__lock:
+				if delivered.is_set():
+					return
+				delivered.set()
+				self.__pending.pop(job.id, None)
+				job.finished = time.perf_counter()
+				job.timed_out = timed_out
+				self.__counters[self.__outcome(job)] += 1
+			if deliver is not None:
+				try:
+					deliver(job)
+				except Exception as e:
+					logging.warning(f"{self.__class__.__name__}.submit({fn.__qualname__}) -> {e.__class__.__name__}: {e}")
+
+		with self.__lock:
+			self.__reserved -= 1
+			self.__pending[job.id] = job
+			self.__counters['submitted'] += 1
+			self.__counters['peak_pending'] = max(self.__counters['peak_pending'], len(self.__pending))
+
+		if timeout is not None:
+			timer = threading.Timer(timeout, self.__on_timeout, args=(job, finish))
+			timer.daemon = True
+			timer.start()
+			job.future.add_done_callback(lambda _: timer.cancel())
+		job.future.add_done_callback(lambda _: finish())
+		return job
+
+	@staticmethod
+	def __on_timeout(job: OffloadJob, finish: Callable[[bool], None]) -> None:
+		# Delivered as timed out before cancelling: cancelling a queued job runs the done callback,
+		# which would otherwise deliver it as cancelled.
+		if not job.future.done():
+			finish(True)
+			job.future.cancel()
+
+	@staticmethod
+	def __outcome(job: OffloadJob) -> str:
+		if job.timed_out:
+			return 'timed_out'
+		if job.future.cancelled():
+			return 'cancelled'
+		try:
+			return 'failed' if job.future.exception(timeout=0) is not None else 'completed'
+		except CancelledError:
+			return 'cancelled'
+
+	def stats(self) -> OffloadStats:
+		with self.__lock:
+			return OffloadStats(
+				workers=self.max_workers,
+				pending=len(self.__pending),
+				**self.__counters,
+			)
+
+	def shutdown(self, cancel_futures: bool = True) -> None:
+		with self.__lock:
+			executor, self.__executor = self.__executor, None
+		if executor is not None:
+			executor.shutdown(wait=False, cancel_futures=cancel_futures)
+
+
+_shared: Offload | None = None
+_shared_lock = threading.Lock()
+
+
+def shared_offload() -> Offload:
+	global _shared
+	with _shared_lock:
+		if _shared is None:
+			_shared = Offload()
+		return _shared
@@ -1,18 +1,148 @@
 from __future__ import annotations
 from abc import ABC
+from collections.abc import Awaitable, Callable, Iterator
+from concurrent.futures import Future
+from contextlib import contextmanager
+from contextvars import ContextVar
 from typing import TYPE_CHECKING
+import dataclasses
+import logging
+import threading
+
+from .offload import OffloadJob, shared_offload
 
 if TYPE_CHECKING:
 	from flet import (
 		Container,
+		Control,
 		Page,
 	)
 	from event_system import EventSystem
 
 
+@dataclasses.dataclass
+class UpdateStats:
+	events: int = 0
+	requests: int = 0
+	flushes: int = 0
+
+	@property
+	def avoided_flushes(self) -> int:
+		return self.requests - self.flushes
+
+
+class UpdateBatch:
+	def __init__(self, page: Page | None, name: str):
+		self.page = page
+		self.name = name
+		self.requests = 0
+		self.controls: dict[int, Control] = {}
+		self.closed = False
+		# Handler threads may still add to a batch while the loop thread flushes it.
+		self.lock = threading.Lock()
+
+	@property
+	def avoided_flushes(self) -> int:
+		return self.requests - (1 if self.controls else 0)
+
+	# Returns False once the batch is flushed, and the caller updates the controls itself.
+	def add(self, controls: tuple[Control, ...]) -> bool:
+		with self.lock:
+			if self.closed:
+				return False
+			self.requests += len(controls)
+			for control in controls:
+				self.controls.setdefault(id(control), control)
+			return True
+
+	def flush(self) -> None:
+		with self.lock:
+			self.closed = True
+			controls = list(self.controls.values())
+		if not controls:
+			return
+		if self.page is not None:
+			self.page.update(*controls)
+		else:
+			for control in controls:
+				control.update()
+
+
+_update_batch: ContextVar[UpdateBatch | None] = ContextVar('update_batch', default=None)
+
+
+def _open_batch() -> UpdateBatch | None:
+	batch = _update_batch.get()
+	return None if batch is None or batch.closed else batch
+
+
+def request_update(*controls: Control) -> None:
+	batch = _update_batch.get()
+	if batch is None or not batch.add(controls):
+		for control in controls:
+			control.update()
+
+
+# Collects update() requests made during a handler and sends all dirty controls in one page.update() on exit.
+# Nested batches join the outermost one.
+@contextmanager
+def batch_updates(page: Page | None, name: str = '') -> Iterator[UpdateBatch]:
+	batch = _open_batch()
+	if batch is not None:
+		yield batch
+		return
+
+	batch = UpdateBatch(page, name)
+	token = _update_batch.set(batch)
+	try:
+		yield batch
+	finally:
+		_update_batch.reset(token)
+		batch.flush()
+		logging.debug(f'batch_updates({name}): {batch.requests} update requests, {batch.avoided_flushes} flushes avoided')
+
+
 class APlugin(ABC):
 	order: int | float = float('inf')
 	container: Container
 	page: Page
 	name: str
 	event_system: EventSystem
+
+	# A task gets a copy of the context it is started from, so one started by a handler would otherwise keep
+	# adding to the handler's batch after it is flushed.
+	def run_task(self, handler: Callable[..., Awaitable], *args) -> Future:
+		async def outside_batch():
+			_update_batch.set(None)
+			return await handler(*args)
+
+		return self.page.run_task(outside_batch)
+
+	@property
+	def update_stats(self) -> dict[str, UpdateStats]:
+		return self.__dict__.setdefault('_update_stats', {})
+
+	@contextmanager
+	def batch_updates(self, name: str) -> Iterator[UpdateBatch]:
+		is_outermost = _open_batch() is None
+		with batch_updates(self.page, f'{self.__class__.__name__}.{name}') as batch:
+			requests = batch.requests
+			yield batch
+
+		stats = self.update_stats.setdefault(name, UpdateStats())
+		stats.events += 1
+		stats.requests += batch.requests - requests
+		stats.flushes += 1 if is_outermost and batch.controls else 0
+
+	# Runs picklable fn(*args) in the shared worker process pool and emits `event` with the finished OffloadJob
+	# on the app loop; the handler gets the value, or the error, from job.result().
+	def submit(self, fn: Callable, *args, event: str, timeout: float | None = None) -> OffloadJob:
+		loop = getattr(self.page, 'loop', None)
+
+		def deliver(job: OffloadJob) -> None:
+			if loop is not None and loop.is_running():
+				loop.call_soon_threadsafe(self.event_system.emit, event, job)
+			else:
+				self.event_system.emit(event, job)
+
+		return shared_offload().submit(fn, *args, deliver=deliver, timeout=timeout)
@@ -0,0 +1 @@
+from .plugin import *
@@ -0,0 +1,226 @@
+from __future__ import annotations
+from collections.abc import Callable
+from functools import partial
+from typing import Any
+import dataclasses
+import logging
+import threading
+
+from flet import (
+	Page,
+	Container,
+	Column,
+	Row,
+	Divider,
+	Switch,
+	ControlEvent,
+	ListView,
+	Text,
+	TextSpan,
+	TextStyle,
+	Colors,
+	ScrollMode,
+)
+import numpy as np
+
+import constants
+from events import Events
+
+from plugins.offload import OffloadJob
+from plugins.plugin import APlugin
+from plugins.loan.calculator import Annuity
+from plugins.loan.utils import validate_pos_float
+from plugins.loan.view import Line
+
+from .sweep import GridChunk, Sweep
+from .utils import validate_pos_percent_range, validate_pos_int_range
+
+
+TABLE_FONT = "Courier New"
+TABLE_ROW_HEADER_WIDTH = 6
+TABLE_COLUMN_WIDTH = 11
+HEATMAP_COLORS = (
+	Colors.GREEN_100,
+	Colors.LIGHT_GREEN_100,
+	Colors.LIME_100,
+	Colors.YELLOW_100,
+	Colors.AMBER_100,
+	Colors.ORANGE_100,
+	Colors.DEEP_ORANGE_100,
+	Colors.RED_100,
+)
+
+
+@dataclasses.dataclass(frozen=True)
+class SweepTable:
+	rows: list[Text]
+	terms: np.ndarray
+	color_of: Callable[[float], str]
+	is_overpayment: bool
+
+
+class SensitivityPlugin(APlugin):
+	name = "Sensitivity"
+	order = 1
+
+	def __init__(self, page: Page, event_system):
+		self.page = page
+		self.event_system = event_system
+
+		self.loan_amount = None
+		self.interest_rates_yearly = None
+		self.loan_terms_years = None
+
+		self.values = {}
+		self.sweep_number = 0
+		self.sweep: Sweep | None = None
+		self.sweep_table: SweepTable | None = None
+		self.sweep_lock = threading.Lock()
+
+		self.table_header = Text(font_family=TABLE_FONT, no_wrap=True)
+		self.table = ListView(expand=True)
+		self.table_container = Container(
+			content=Row(
+				controls=[Column(controls=[self.table_header, self.table], expand=True)],
+				scroll=ScrollMode.AUTO,
+				expand=True,
+			),
+			expand=True,
+			visible=False,
+		)
+		self.metric_switch = Switch(label='Ежемесячный платёж, руб', on_change=self.__on_switch)
+
+		self.container = self.build_container()
+		self.event_system.subscribe(Events.Sensitivity.chunk, self.__on_chunk)
+
+	def build_container(self) -> Container:
+		self.loan_amount = Line('Кредит, руб',
+								on_change=partial(self.__on_change, 'loan_amount'),
+								validator=validate_pos_float,
+								event_system=self.event_system)
+		self.interest_rates_yearly = Line('Ставки, % год: от до шаг',
+										  on_change=partial(self.__on_change, 'interest_rates_yearly'),
+										  validator=validate_pos_percent_range,
+										  event_system=self.event_system)
+		self.loan_terms_years = Line('Сроки, лет: от до шаг',
+									 on_change=partial(self.__on_change, 'loan_terms_years'),
+									 validator=validate_pos_int_range,
+									 event_system=self.event_system)
+
+		return Container(
+			content=Column(
+				controls=[
+					self.loan_amount,
+					self.interest_rates_yearly,
+					self.loan_terms_years,
+					self.metric_switch,
+					Divider(),
+					self.table_container,
+				],
+				spacing=0,
+			),
+			width=constants.PLUGIN_CONTAINER_WIDTH,
+			height=constants.PLUGIN_CONTAINER_HEIGHT,
+		)
+
+	def __on_change(self, field: str, value: Any):
+		self.values[field] = value
+		self.__run_sweep()
+
+	def __on_switch(self, event: ControlEvent):
+		self.metric_switch.label = 'Переплата, руб' if event.control.value else 'Ежемесячный платёж, руб'
+		self.metric_switch.update()
+		self.__run_sweep()
+
+	def __run_sweep(self):
+		if not all(k in self.values for k in ('loan_amount', 'interest_rates_yearly', 'loan_terms_years')):
+			return
+
+		with self.sweep_lock:
+			self.sweep_number += 1
+			sweep_number = self.sweep_number
+			if self.sweep is not None:
+				self.sweep.cancel()
+				self.sweep = self.sweep_table = None
+
+		loan_amount = self.values['loan_amount']
+		rates = self.values['interest_rates_yearly']
+		terms = self.values['loan_terms_years']
+		is_overpayment = bool(self.metric_switch.value)
+
+		try:
+			color_of = self.__heatmap(loan_amount, rates, terms, is_overpayment)
+			self.table_header.value = (
+				'лет/%'.ljust(TABLE_ROW_HEADER_WIDTH)
+				+ ''.join(f'{r * 100:.2f}'.rjust(TABLE_COLUMN_WIDTH) for r in rates.tolist())
+			)
+			rows = [Text(font_family=TABLE_FONT, no_wrap=True) for _ in range(len(terms))]
+			self.table.controls = rows
+			self.table_container.visible = True
+			self.container.update()
+
+			# The chunks are rendered by __on_chunk as they arrive, so no handler thread waits for the sweep.
+			# It is created under the lock, and __on_chunk takes the lock too, so no chunk is seen before its
+			# sweep is current.
+			with self.sweep_lock:
+				if sweep_number != self.sweep_number:
+					return
+				self.sweep = Sweep(partial(self.submit, event=Events.Sensitivity.chunk), loan_amount, rates, terms)
+				self.sweep_table = SweepTable(rows, terms, color_of, is_overpayment)
+		except Exception as e:
+			self.__on_error('__run_sweep', e)
+
+	def __on_chunk(self, job: OffloadJob):
+		with self.sweep_lock:
+			sweep, table = self.sweep, self.sweep_table
+		if sweep is None or table is None or not sweep.owns(job) or job.cancelled():
+			return
+
+		try:
+			self.__render_chunk(job.result(), table.rows, table.terms, table.color_of, table.is_overpayment)
+			self.table.update()
+		except Exception as e:
+			sweep.cancel()
+			with self.sweep_lock:
+				if self.sweep is sweep:
+					self.sweep = self.sweep_table = None
+			self.__on_error('__on_chunk', e)
+
+	def __on_error(self, name: str, e: Exception):
+		self.table_container.visible = False
+		message = f"{self.__class__.__name__}.{name}: {e.__class__.__name__}: {e}"
+		logging.warning(message)
+		self.event_system.emit(Events.Main.error, message)
+
+	@staticmethod
+	def __heatmap(loan_amount: float, rates: np.ndarray, terms: np.ndarray, is_overpayment: bool) -> Callable[[float], str]:
+		# Both metrics are monotonic in rate and term, so the grid extremes are known before it is computed:
+		# the payment falls with the term, the overpayment grows with it.
+		def value_at(rate: float, term: int) -> float:
+			summary = Annuity.of(loan_amount, rate, term).summary()
+			return summary.total_interest if is_overpayment else summary.payment
+
+		low = value_at(rates[0], terms[0] if is_overpayment else terms[-1])
+		high = value_at(rates[-1], terms[-1] if is_overpayment else terms[0])
+		scale = (len(HEATMAP_COLORS) - 1) / (high - low) if high > low else 0.0
+
+		def color_of(value: float) -> str:
+			return HEATMAP_COLORS[min(max(int((value - low) * scale), 0), len(HEATMAP_COLORS) - 1)]
+
+		return color_of
+
+	@staticmethod
+	def __render_chunk(chunk: GridChunk,
+					   rows: list[Text],
+					   terms: np.ndarray,
+					   color_of: Callable[[float], str],
+					   is_overpayment: bool) -> None:
+		values = chunk.overpayments if is_overpayment else chunk.payments
+		for n, row_values in enumerate(values.tolist(), start=chunk.first_row):
+			rows[n].spans = [
+				TextSpan(f'{terms[n]}'.ljust(TABLE_ROW_HEADER_WIDTH)),
+				*(
+					TextSpan(f'{v:.0f}'.rjust(TABLE_COLUMN_WIDTH), TextStyle(bgcolor=color_of(v)))
+					for v in row_values
+				),
+			]
@@ -0,0 +1,58 @@
+from __future__ import annotations
+from collections.abc import Callable
+import dataclasses
+
+import numpy as np
+
+from plugins.loan.calculator import NUMBER_OF_MONTHS_IN_YEAR, calc_payments
+from plugins.offload import OffloadJob, shared_offload
+
+
+CHUNKS_PER_WORKER = 2
+
+
+@dataclasses.dataclass(frozen=True)
+class GridChunk:
+	first_row: int
+	payments: np.ndarray
+	overpayments: np.ndarray
+
+
+def calc_grid(loan_amount: float, interest_rates_yearly, loan_terms_years, first_row: int = 0) -> GridChunk:
+	interest_rates_yearly = np.asarray(interest_rates_yearly, dtype=np.float64)[None, :]
+	loan_terms_years = np.asarray(loan_terms_years, dtype=np.int64)[:, None]
+	payments = calc_payments(loan_amount, interest_rates_yearly, loan_terms_years)
+	overpayments = np.where(
+		loan_terms_years == 0,
+		0.0,
+		payments * (loan_terms_years * NUMBER_OF_MONTHS_IN_YEAR) - loan_amount,
+	)
+	return GridChunk(first_row=first_row, payments=payments, overpayments=overpayments)
+
+
+# The grid is computed in chunks in the shared worker pool, each delivered as an OffloadJob through `submit`.
+# A superseded sweep is cancelled, so the jobs still queued for it are dropped instead of filling the queue
+# while the user types.
+class Sweep:
+	def __init__(self,
+				 submit: Callable[..., OffloadJob],
+				 loan_amount: float,
+				 interest_rates_yearly: np.ndarray,
+				 loan_terms_years: np.ndarray) -> None:
+		number_of_chunks = min(len(loan_terms_years), CHUNKS_PER_WORKER * shared_offload().max_workers)
+		self.jobs: dict[int, OffloadJob] = {}
+		try:
+			for rows in np.array_split(np.arange(len(loan_terms_years)), number_of_chunks):
+				if len(rows):
+					job = submit(calc_grid, loan_amount, interest_rates_yearly, loan_terms_years[rows], int(rows[0]))
+					self.jobs[job.id] = job
+		except Exception:
+			self.cancel()
+			raise
+
+	def owns(self, job: OffloadJob) -> bool:
+		return self.jobs.get(job.id) is job
+
+	def cancel(self) -> None:
+		for job in self.jobs.values():
+			job.cancel()
@@ -0,0 +1,32 @@
+from collections.abc import Callable
+from typing import Any
+
+import numpy as np
+
+from plugins.loan.utils import validate_pos_float, validate_pos_int, validate_pos_percent
+
+
+MAX_GRID_SIDE = 200
+
+
+def validate_range(value: Any, validator: Callable[[Any], float] = validate_pos_float) -> np.ndarray:
+	parts = str(value).replace(';', ' ').split()
+	assert 1 <= len(parts) <= 3, f"Ожидается диапазон 'от до шаг', получено: {value}"
+
+	start = validator(parts[0])
+	stop = validator(parts[1]) if len(parts) > 1 else start
+	assert stop >= start, f"Начало диапазона больше конца: {start} > {stop}"
+	step = validator(parts[2]) if len(parts) > 2 else (stop - start) or 1
+	assert step > 0, f"Ожидается положительный шаг, получено: {step}"
+
+	count = int((stop - start) / step + 1e-9) + 1
+	assert count <= MAX_GRID_SIDE, f"Ожидается не больше {MAX_GRID_SIDE} значений, получено: {count}"
+	return start + step * np.arange(count)
+
+
+def validate_pos_percent_range(value: Any) -> np.ndarray:
+	return validate_range(value, validate_pos_percent)
+
+
+def validate_pos_int_range(value: Any) -> np.ndarray:
+	return validate_range(value, validate_pos_int).astype(np.int64)
@@ -0,0 +1,131 @@
+import argparse
+import asyncio
+import dataclasses
+import logging
+import os
+import resource
+import threading
+import tracemalloc
+
+from flet import Page, app
+
+from plugins.beam.plugin import wx_cache
+from plugins.cache import CacheStats
+from plugins.loan.cache import shared_schedule_cache
+import main
+
+
+DEFAULT_PORT = 8550
+REPORT_SECONDS = 60
+
+
+# The per-session figures are rough estimates. The RSS figure also counts the growth of the shared caches and
+# the allocator, and the traced figure is taken around the first frame only, so it misses later renders and
+# includes anything other sessions allocated at the same time.
+@dataclasses.dataclass(frozen=True)
+class CapacityReport:
+    sessions: int
+    sessions_opened: int
+    rss_bytes: int
+    bytes_per_session: float
+    traced_bytes_per_session: float | None
+    schedule_cache: CacheStats
+    wx_cache: CacheStats
+
+    def __str__(self):
+        traced = (
+            f", traced ~{self.traced_bytes_per_session / 2 ** 10:.0f} KiB/session"
+            if self.traced_bytes_per_session is not None else ''
+        )
+        return (
+            f"{self.sessions} sessions ({self.sessions_opened} opened), RSS {self.rss_bytes / 2 ** 20:.1f} MiB, "
+            f"~{self.bytes_per_session / 2 ** 10:.0f} KiB/session (rough){traced}; "
+            f"schedule cache {self.schedule_cache.entries} entries, {self.schedule_cache.nbytes / 2 ** 20:.1f} MiB, "
+            f"hit rate {self.schedule_cache.hit_rate:.0%}; "
+            f"Wx cache {self.wx_cache.entries} entries, hit rate {self.wx_cache.hit_rate:.0%}"
+        )
+
+
+def rss_bytes() -> int:
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+# Sessions share the schedule and Wx caches and the worker pools; only the controls and inputs of the tabs
+# a user opened are per session, which is what the per-session figures measure.
+class Sessions:
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.baseline_rss = rss_bytes()
+        self.__lock = threading.Lock()
+        self.__sessions: dict[str, int] = {}
+        self.__opened = 0
+
+    async def open(self, page: Page) -> None:
+        traced_before = tracemalloc.get_traced_memory()[0] if self.trace_memory else 0
+        await main.main(page)
+        traced = tracemalloc.get_traced_memory()[0] - traced_before if self.trace_memory else 0
+
+        with self.__lock:
+            self.__sessions[page.session_id] = traced
+            self.__opened += 1
+
+        def close(event) -> None:
+            with self.__lock:
+                self.__sessions.pop(page.session_id, None)
+
+        page.on_close = close
+
+    def report(self) -> CapacityReport:
+        with self.__lock:
+            sessions = len(self.__sessions)
+            traced = sum(self.__sessions.values())
+            opened = self.__opened
+        rss = rss_bytes()
+        return CapacityReport(
+            sessions=sessions,
+            sessions_opened=opened,
+            rss_bytes=rss,
+            bytes_per_session=(rss - self.baseline_rss) / sessions if sessions else 0.0,
+            traced_bytes_per_session=traced / sessions if self.trace_memory and sessions else None,
+            schedule_cache=shared_schedule_cache().stats(),
+            wx_cache=wx_cache.stats(),
+        )
+
+    async def report_every(self, seconds: float) -> None:
+        while True:
+            await asyncio.sleep(seconds)
+            logging.info(f"server: {self.report()}")
+
+
+def serve(host: str | None, port: int, trace_memory: bool = False, report_seconds: float = REPORT_SECONDS) -> None:
+    if trace_memory:
+        tracemalloc.start()
+    sessions = Sessions(trace_memory)
+    reporter: asyncio.Task | None = None
+
+    async def session(page: Page) -> None:
+        nonlocal reporter
+        if reporter is None:
+            reporter = asyncio.get_running_loop().create_task(sessions.report_every(report_seconds))
+        await sessions.open(page)
+
+    app(session, host=host, port=port, view=None)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Serve the calculators to browser sessions.')
+    parser.add_argument('--host', default=None, help='Interface to listen on, all by default.')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--trace-memory', action='store_true', help='Measure per-session allocations with tracemalloc.')
+    parser.add_argument('--report-seconds', type=float, default=REPORT_SECONDS, help='Capacity report interval.')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO)
+    serve(args.host, args.port, args.trace_memory, args.report_seconds)